@@ -3,7 +3,8 @@ import logging
 import re
 import sys
 from abc import ABC, abstractmethod
-from typing import List, Optional, Union
+from concurrent.futures import Future
+from typing import Dict, Iterable, List, Optional, Union
 
 from discord.utils import find
 from errbot.backends.base import (
@@ -133,8 +134,9 @@ class DiscordPerson(Person, DiscordSender):
             loop=DiscordBackend.client.loop,
         )
 
-    def edit_nickname(self, name: str):
-        asyncio.run_coroutine_threadsafe(
+    def edit_nickname(self, name: str) -> Future:
+        """ Schedule the nickname edit, return a future completed once applied """
+        return asyncio.run_coroutine_threadsafe(
             self.get_discord_guild_member().edit(nick=name),
             loop=DiscordBackend.client.loop,
         )
@@ -654,8 +656,12 @@ class DiscordBackend(ErrBot):
             else:
                 return DiscordRoom(room_name[1:], guild.id)
 
-    def send_file(self, user: DiscordPerson, filepath):
-        file = discord.File(filepath, filename=filepath)
+    def send_file(self, user: DiscordPerson, filepath, filename: Optional[str] = None):
+        """
+        Send a file to a user, `filepath` is either a path or a binary file object.
+        `filename` is the attachment name, required when sending a file object.
+        """
+        file = discord.File(filepath, filename=filename or filepath)
         log.debug("Sending file to user")
         asyncio.run_coroutine_threadsafe(user.send(file=file), loop=self.client.loop)
 
@@ -797,6 +803,31 @@ class DiscordBackend(ErrBot):
 
         return DiscordPerson(user_id=member.id)
 
+    def build_identifiers(
+        self, string_representations: Iterable[str]
+    ) -> Dict[str, DiscordPerson]:
+        """
+        Same as `build_identifier` for multiple `user#discriminator`, looked up in a
+        single pass over the guild members. Unknown users are left out.
+
+        :param string_representations:
+        :return: strrep -> Identifier
+        """
+        wanted = {}
+        for strrep in string_representations:
+            user, _, discriminator = str(strrep).rpartition("#")
+            if user:
+                wanted.setdefault((user, discriminator), strrep)
+
+        identifiers = {}
+        for member in DiscordBackend.client.get_all_members():
+            strrep = wanted.pop((member.name, member.discriminator), None)
+            if strrep is not None:
+                identifiers[strrep] = DiscordPerson(user_id=member.id)
+                if not wanted:
+                    break
+        return identifiers
+
     def upload_file(self, msg, filename):
         if msg.is_direct:
             log.debug("Sending file to user")
@@ -1,16 +1,57 @@
 import datetime
 import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from copy import deepcopy
 from configparser import ConfigParser
-from typing import List, Optional
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from plugins.tournament_manager.utils.aimd_limiter import AIMDLimiter
+from plugins.tournament_manager.utils.token_bucket import TokenBucket
 
 logger = logging.getLogger(__name__)
 
+# max number of concurrent requests to the Toornament API, lowered while it fails
+MAX_CONCURRENT_REQUESTS = 8
+# requests allowed in a burst, and refilled per second, before queueing locally
+RATE_LIMIT_BURST = 10
+RATE_LIMIT_PER_SECOND = 5
+# requests left in the Toornament rate limit window under which we slow down
+RATE_LIMIT_REMAINING_THRESHOLD = 1
+# seconds a Toornament response is reused before fetching it again
+TOURNAMENT_CACHE_TTL = 60
+PARTICIPANTS_CACHE_TTL = 60
+MATCH_CACHE_TTL = 30
+
 
 class ToornamentAPIClient:
     def __init__(self, config_file: str = "config.ini"):
-        self.token: Optional[dict] = None
+        # scope -> access token
+        self.tokens: Dict[str, dict] = {}
+        self._concurrency_limiter = AIMDLimiter(MAX_CONCURRENT_REQUESTS)
+        self._rate_limiter = TokenBucket(RATE_LIMIT_BURST, RATE_LIMIT_PER_SECOND)
+        self._session = requests.Session()
+        self._session.mount(
+            "https://",
+            HTTPAdapter(
+                pool_connections=10,
+                pool_maxsize=32,
+                max_retries=Retry(
+                    total=3, backoff_factor=0.3, status_forcelist=[502, 503, 504]
+                ),
+            ),
+        )
+        # (url, range, params) -> (conditional request headers, last status code,
+        # Content-Range and parsed body)
+        self._conditional_cache: Dict[tuple, Tuple[dict, int, Optional[str], Any]] = {}
+        # (resource, *ids) -> (monotonic time fetched, response)
+        self._cache: Dict[tuple, Tuple[float, Any]] = {}
+        # fetches pages and batches of resources concurrently
+        self._executor = ThreadPoolExecutor(max_workers=MAX_CONCURRENT_REQUESTS)
 
         # load config
         config = ConfigParser()
@@ -23,16 +64,33 @@ class ToornamentAPIClient:
         except KeyError:
             raise Exception("Could not load Toornament configuration")
 
+    def invalidate(self, *key_prefix):
+        """
+        Drop cached responses whose key starts with `key_prefix`,
+        e.g. `invalidate("participants", tournament_id)`. Drop everything if omitted
+        """
+        size = len(key_prefix)
+        for key in list(self._cache):
+            if key[:size] == key_prefix:
+                self._cache.pop(key, None)
+
     def get_tournament(self, tournament_id: int) -> Optional[dict]:
         """
         See: https://developer.toornament.com/v2/doc/organizer_tournaments#get:tournaments:id  # noqa
         """
+        return self._cached(
+            ("tournament", tournament_id),
+            TOURNAMENT_CACHE_TTL,
+            lambda: self._fetch_tournament(tournament_id),
+        )
+
+    def _fetch_tournament(self, tournament_id: int) -> Optional[dict]:
         headers = self._get_headers(auth=True)
         url = f"{self.api_url}/organizer/v2/tournaments/{tournament_id}"
 
-        return next(iter(self._get_full_result(url, headers)), {})
+        return self._get_resource(url, headers)
 
-    def get_tournaments(self, params: Optional[dict] = None) -> List[dict]:
+    def get_tournaments(self, params: Optional[dict] = None) -> Optional[List[dict]]:
         """
         See: https://developer.toornament.com/v2/doc/organizer_tournaments#get:tournaments
         """
@@ -54,15 +112,41 @@ class ToornamentAPIClient:
             f"/participants/{participant_id}"
         )
 
-        return next(iter(self._get_full_result(url, headers)), {})
+        return self._get_resource(url, headers)
+
+    def get_participants_by_ids(
+        self, tournament_id: int, participant_ids: Iterable[int]
+    ) -> List[dict]:
+        """
+        Fetch multiple participants concurrently, results are in the same order as
+        `participant_ids` with an empty dict for participants that couldn't be fetched
+        """
+        participant_ids = list(participant_ids)
+        if len(participant_ids) <= 1:
+            return [self.get_participant(tournament_id, i) for i in participant_ids]
+
+        return list(
+            self._executor.map(
+                lambda i: self.get_participant(tournament_id, i), participant_ids
+            )
+        )
 
     def get_match(self, tournament_id, match_id) -> Optional[dict]:
+        return self._cached(
+            ("match", tournament_id, match_id),
+            MATCH_CACHE_TTL,
+            lambda: self._fetch_match(tournament_id, match_id),
+        )
+
+    def _fetch_match(self, tournament_id, match_id) -> Optional[dict]:
         headers = self._get_headers(scope="organizer:result", range="matches=0-99")
         url = f"{self.api_url}/viewer/v2/tournaments/{tournament_id}/matches/{match_id}"
 
-        return next(iter(self._get_full_result(url, headers)), {})
+        return self._get_resource(url, headers)
 
-    def get_matches(self, tournament_id, params: Optional[dict] = None) -> List[dict]:
+    def get_matches(
+        self, tournament_id, params: Optional[dict] = None
+    ) -> Optional[List[dict]]:
         headers = self._get_headers(scope="organizer:result", range="matches=0-99")
         url = f"{self.api_url}/viewer/v2/tournaments/{tournament_id}/matches"
 
@@ -70,41 +154,127 @@ class ToornamentAPIClient:
 
     def get_participants(
         self, tournament_id, params: Optional[dict] = None
-    ) -> List[dict]:
-        if not params:
-            params = {"sort": "alphabetic"}
+    ) -> Optional[List[dict]]:
+        if params:
+            return self._fetch_participants(tournament_id, params)
+
+        return self._cached(
+            ("participants", tournament_id),
+            PARTICIPANTS_CACHE_TTL,
+            lambda: self._fetch_participants(tournament_id, {"sort": "alphabetic"}),
+        )
 
+    def _fetch_participants(self, tournament_id, params: dict) -> Optional[List[dict]]:
         headers = self._get_headers(Range="participants=0-49")
         url = f"{self.api_url}/viewer/v2/tournaments/{tournament_id}/participants"
 
         return self._get_full_result(url, headers, params=params)
 
-    def _get_full_result(self, url, headers, params=None, result=None) -> List[dict]:
+    def _cached(self, key: tuple, ttl: float, fetch: Callable[[], Any]) -> Any:
+        """
+        Return the response cached under `key` if fetched less than `ttl` seconds ago,
+        otherwise `fetch` it. Empty responses (errors) are not cached.
+        Callers get their own copy of the response, free to modify it
+        """
+        cached = self._cache.get(key)
+        if cached and time.monotonic() - cached[0] < ttl:
+            return deepcopy(cached[1])
+
+        response = fetch()
+        if response:
+            self._cache[key] = (time.monotonic(), deepcopy(response))
+        return response
+
+    def _get_full_result(self, url, headers, params=None) -> Optional[List[dict]]:
+        """
+        Get a list, fetching the remaining pages of a paginated response concurrently
+        once the first page gives the total number of items.
+        None if any page couldn't be fetched, rather than an incomplete list
+        """
         if not params:
             params = {}
-        if not result:
-            result = []
 
-        response = requests.get(url, headers=headers, params=params)
+        status_code, body, content_range = self._conditional_get(url, headers, params)
 
         # Standard response
-        if response.status_code == 200:
-            result.append(response.json())
+        if status_code == 200:
+            return [body]
         # Paginated response
-        elif response.status_code == 206:
-            result.extend(response.json())
-            next_pagination = self._get_next_pagination(
-                response.headers.get("Content-Range")
-            )
-            if next_pagination:
-                headers.update({"Range": next_pagination})
-                self._get_full_result(url, headers, params, result)
-        else:
-            logger.error(
-                f"Can't retrieve list, code {response.status_code}: {response.content}"
-            )
+        if status_code == 206:
+            result = body
+            page_ranges = self._get_page_ranges(content_range)
+            if not page_ranges:
+                return result
+
+            for page in self._executor.map(
+                lambda page_range: self._get_page(url, headers, params, page_range),
+                page_ranges,
+            ):
+                if page is None:
+                    return None
+                result.extend(page)
+            return result
+
+        logger.error(f"Can't retrieve list, code {status_code}: {body}")
+        return None
 
-        return result
+    def _get_page(self, url, headers, params, page_range: str) -> Optional[List[dict]]:
+        status_code, body, _ = self._conditional_get(
+            url, {**headers, "Range": page_range}, params
+        )
+        if status_code in (200, 206):
+            return body
+
+        logger.error(f"Can't retrieve page {page_range}, code {status_code}: {body}")
+        return None
+
+    def _get_resource(self, url, headers) -> dict:
+        status_code, body, _ = self._conditional_get(url, headers)
+
+        if status_code == 200:
+            return body
+        if status_code == 206:
+            return next(iter(body), {})
+
+        logger.error(f"Can't retrieve resource, code {status_code}: {body}")
+        return {}
+
+    def _conditional_get(
+        self, url, headers, params: Optional[dict] = None
+    ) -> Tuple[int, Any, Optional[str]]:
+        """
+        GET with a conditional request when the same url, range and params were
+        already fetched, a `304 Not Modified` response returns a copy of the previous
+        response. Return the status code, the parsed body (the raw content on error)
+        and the Content-Range header
+        """
+        key = (url, headers.get("Range"), repr(sorted(params.items())) if params else "")
+        cached = self._conditional_cache.get(key)
+        if cached:
+            headers = {**headers, **cached[0]}
+
+        response = self._request("GET", url, headers=headers, params=params or {})
+
+        if response.status_code == 304 and cached:
+            return cached[1], deepcopy(cached[3]), cached[2]
+        if response.status_code not in (200, 206):
+            return response.status_code, response.content, None
+
+        body = response.json()
+        content_range = response.headers.get("Content-Range")
+        validators = {}
+        if response.headers.get("ETag"):
+            validators["If-None-Match"] = response.headers["ETag"]
+        if response.headers.get("Last-Modified"):
+            validators["If-Modified-Since"] = response.headers["Last-Modified"]
+        if validators:
+            self._conditional_cache[key] = (
+                validators,
+                response.status_code,
+                content_range,
+                deepcopy(body),
+            )
+        return response.status_code, body, content_range
 
     def _get_headers(self, auth=False, scope=None, **kwargs) -> dict:
         headers = {
@@ -129,13 +299,14 @@ class ToornamentAPIClient:
             scope = "organizer:view"
         now = datetime.datetime.now()
 
-        if self.token:
-            expires_in = self.token.get("expires_in")
-            is_expired = self.token.get("timestamp") < now - datetime.timedelta(
+        token = self.tokens.get(scope)
+        if token:
+            expires_in = token.get("expires_in")
+            is_expired = token.get("timestamp") < now - datetime.timedelta(
                 seconds=expires_in
             )
             if not is_expired:
-                return self.token
+                return token
 
         # we don't have a token or it's expired
         url = f"{self.api_url}/oauth/v2/token"
@@ -147,16 +318,74 @@ class ToornamentAPIClient:
             "scope": scope,
         }
 
-        response = requests.post(url, headers=headers, data=data)
+        response = self._request("POST", url, headers=headers, data=data)
 
         if response.status_code == 200:
             token = response.json()
             token.update({"timestamp": now})
+            self.tokens[scope] = token
             return token
 
         logger.error("Failed to get access token: %s", response)
         raise Exception("Failed to get access token")
 
+    def _request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        Send a request on the shared session, limiting concurrent requests and
+        their rate. A request rejected with `429 Too Many Requests` is sent again
+        once, after the delay requested by Toornament.
+        Rate limited and server error responses lower the concurrency limit.
+        """
+        for _ in range(2):
+            self._rate_limiter.acquire()
+            self._concurrency_limiter.acquire()
+            success = False
+            try:
+                response = self._session.request(method, url, **kwargs)
+                success = response.status_code != 429 and response.status_code < 500
+            finally:
+                self._concurrency_limiter.release(success)
+
+            retry_after = self._get_retry_after(response)
+            if retry_after is None:
+                break
+            self._rate_limiter.drain(retry_after)
+            if response.status_code != 429:
+                break
+
+        return response
+
+    @staticmethod
+    def _get_retry_after(response: requests.Response) -> Optional[float]:
+        """
+        Seconds to wait before the next request when rate limited, or when the
+        Toornament rate limit is almost reached. None if requests can go on.
+        """
+        remaining = response.headers.get("X-RateLimit-Remaining")
+        if response.status_code != 429 and not (
+            remaining
+            and remaining.isdigit()
+            and int(remaining) <= RATE_LIMIT_REMAINING_THRESHOLD
+        ):
+            return None
+
+        retry_after = response.headers.get("Retry-After", "")
+        return int(retry_after) if retry_after.isdigit() else 1
+
+    @classmethod
+    def _get_page_ranges(cls, content_range: Optional[str]) -> List[str]:
+        """ Ranges of all the pages after a `Content-Range`, e.g. `items 0-49/120` """
+        page_ranges = []
+        next_pagination = cls._get_next_pagination(content_range)
+        while next_pagination:
+            page_ranges.append(next_pagination)
+            content_type, page_range = next_pagination.split("=")
+            total = content_range.rsplit("/", 1)[1]
+            next_pagination = cls._get_next_pagination(
+                f"{content_type} {page_range}/{total}"
+            )
+        return page_ranges
+
     @staticmethod
     def _get_next_pagination(content, increment_step=49):
         if not content:
@@ -1,5 +1,16 @@
 from functools import wraps
 
+_CHAN_DEL = str.maketrans("", "", "<>")
+_CHANNEL_ERR_FMT = (
+    "Please use this command in private or in the tournament "
+    "assigned bot channels: {}"
+)
+
+
+def _sanitize(name: str) -> str:
+    """ Strip the Discord channel mention brackets from a channel name """
+    return name.translate(_CHAN_DEL)
+
 
 def tournament_channel_only(func):
     """
@@ -11,36 +22,28 @@ def tournament_channel_only(func):
 
     @wraps(func)
     def wrap(*args, **kwargs):
-        def sanitize_channel(name):
-            return name.replace("<", "").replace(">", "")
-
         plugin, msg, *_ = args
+        if msg.is_direct:
+            return func(*args, **kwargs)
+
         tournament_channels = None
-        if hasattr(kwargs, "alias"):
-            tournament_channels = plugin["tournaments"][kwargs["alias"]]["channels"]
-        else:
-            _, tournament = plugin._find_captain_team(
-                msg.frm.fullname, plugin["tournaments"]
-            )
+        alias = kwargs.get("alias")
+        if not alias:
+            alias = plugin._find_captain_alias(msg.frm.fullname)
+        if alias:
+            tournament = plugin._get_tournament(alias)
             if tournament:
                 tournament_channels = tournament.channels
 
-        if msg.is_direct:
-            return func(*args, **kwargs)
-
-        room = sanitize_channel(str(msg.frm.room))
         # no tournament channel set
         if not tournament_channels:
             return func(*args, **kwargs)
         # tournament channel set
+        room = _sanitize(str(msg.frm.room))
         for channel in tournament_channels:
-            if sanitize_channel(channel) == room:
+            if _sanitize(channel) == room:
                 return func(*args, **kwargs)
 
-        plugin.send(
-            msg.frm,
-            "Please use this command in private or in the tournament "
-            "assigned bot channels: " + " ".join(tournament_channels),
-        )
+        plugin.send(msg.frm, _CHANNEL_ERR_FMT.format(" ".join(sorted(tournament_channels))))
 
     return wrap
@@ -1,11 +1,12 @@
 from plugins.tournament_manager.models.match import MatchStatus
 
+_MATCH_STATUS_NAMES = [s.name for s in MatchStatus]
+
 
 class AppError(Exception):
     def __init__(self, *args):
-        super().__init__(
-            f"{self.__class__.__name__}: " f"{', '.join(f'{a}' for a in args)}"
-        )
+        message = args[0] if len(args) == 1 else ", ".join(map(str, args))
+        super().__init__(f"{type(self).__name__}: {message}")
 
 
 class GenericError(AppError):
@@ -25,11 +26,18 @@ class ErrorFetchingParticipantData(AppError):
         )
 
 
+class ErrorFetchingParticipants(AppError):
+    def __init__(self, tournament_id: int):
+        super().__init__(
+            f"Could not fetch the participants of the tournament {tournament_id}"
+        )
+
+
 class InvalidMatchStatus(AppError):
     def __init__(self, status: str):
         super().__init__(
             f"Match status `{status}` doesn't exists. "
-            f"Choices are: {[s.name for s in MatchStatus]}"
+            f"Choices are: {_MATCH_STATUS_NAMES}"
         )
 
 
@@ -1,8 +1,18 @@
-from dataclasses import dataclass, fields, asdict, is_dataclass
+import sys
+from copy import deepcopy
+from dataclasses import dataclass, fields, is_dataclass
+from functools import lru_cache
+from typing import Any, FrozenSet, Tuple
+
+# values returned as is by `to_dict`
+_IMMUTABLE_TYPES = frozenset({str, int, float, bool, type(None)})
 
 
 @dataclass
 class BaseDataClass:
+    # subclasses only get a `__dict__` when they don't declare slots, see `add_slots`
+    __slots__ = ()
+
     def __post_init__(self):
         """
         Convert all fields of type `dataclass` into an instance of the
@@ -10,45 +20,131 @@ class BaseDataClass:
 
         There's some real sketchy stuff here bro.
         """
+        set_fields, dataclass_fields = _converted_fields(type(self))
+
+        # sets are stored as lists
+        for name in set_fields:
+            value = getattr(self, name)
+            if not isinstance(value, set):
+                setattr(self, name, set(value or ()))
 
-        def unpack_values(field_type, val):
-            """ unpack dict if field exists for this type """
-            return field_type(
-                **{
-                    k: v
-                    for k, v in val.items()
-                    if k in {ft.name for ft in fields(field_type)}
-                }
-            )
-
-        cls = type(self)
-        for f in fields(cls):
-            is_list_of_dataclass = (
-                hasattr(f.type, "_name")
-                and f.type._name == "List"
-                and is_dataclass(next(iter(f.type.__args__), None))
-            )
-            # if the field is not a dataclass, OR is not a List of dataclasses
-            if not is_dataclass(f.type) and not is_list_of_dataclass:
-                continue
-
-            value = getattr(self, f.name)
+        for name, field_type, is_list in dataclass_fields:
+            value = getattr(self, name)
 
             if isinstance(value, dict):
-                new_value = unpack_values(f.type, value)
-                setattr(self, f.name, new_value)
-            elif isinstance(value, list):
-                new_value = []
-                for v in value:
-                    if isinstance(v, dict):
-                        new_value.append(unpack_values(f.type.__args__[0], v))
-                setattr(self, f.name, new_value)
+                setattr(self, name, _unpack_values(field_type, value))
+            elif is_list and isinstance(value, list):
+                setattr(
+                    self,
+                    name,
+                    [
+                        _unpack_values(field_type, v) if isinstance(v, dict) else v
+                        for v in value
+                    ],
+                )
 
     @classmethod
     def from_dict(cls, values: dict):
         """ Ignore dict keys if they're not a field of the dataclass """
-        class_fields = {f.name for f in fields(cls)}
-        return cls(**{k: v for k, v in values.items() if k in class_fields})
+        return _unpack_values(cls, values)
 
     def to_dict(self):
-        return asdict(self)
+        return _to_dict(self)
+
+
+def add_slots(cls):
+    """
+    Recreate a dataclass with a `__slots__` entry per field, like `dataclass(slots=True)`
+    of Python 3.10: instances have no `__dict__` and can't hold other attributes
+    """
+    field_names = tuple(f.name for f in fields(cls))
+    cls_dict = dict(cls.__dict__)
+    cls_dict["__slots__"] = field_names
+    # the field defaults are kept by the generated `__init__`
+    for name in field_names:
+        cls_dict.pop(name, None)
+    cls_dict.pop("__dict__", None)
+    cls_dict.pop("__weakref__", None)
+    slotted_cls = type(cls)(cls.__name__, cls.__bases__, cls_dict)
+    slotted_cls.__qualname__ = cls.__qualname__
+    return slotted_cls
+
+
+def intern_str(value: Any) -> Any:
+    """ Intern repeated string values so equality checks compare pointers first """
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+def remove_item(items: list, item):
+    """
+    Remove an item from a list by identity. `list.remove` compares with `==`, which
+    compares every field of each dataclass preceding the item.
+    """
+    for i, value in enumerate(items):
+        if value is item:
+            del items[i]
+            return
+    raise ValueError(f"{item!r} not in list")
+
+
+@lru_cache(maxsize=None)
+def _field_names(cls) -> FrozenSet[str]:
+    return frozenset(f.name for f in fields(cls))
+
+
+@lru_cache(maxsize=None)
+def _ordered_field_names(cls) -> Tuple[str, ...]:
+    return tuple(f.name for f in fields(cls))
+
+
+@lru_cache(maxsize=None)
+def _converted_fields(cls) -> Tuple[Tuple[str, ...], Tuple[Tuple[str, type, bool], ...]]:
+    """
+    Fields of a dataclass that need a conversion after init, computed once per class:
+    the names of the `Set` fields, and `(name, dataclass type, is a list)` of the fields
+    holding a dataclass or a `List` of dataclasses
+    """
+    set_fields = []
+    dataclass_fields = []
+    for f in fields(cls):
+        type_name = getattr(f.type, "_name", None)
+        if type_name == "Set":
+            set_fields.append(f.name)
+        elif is_dataclass(f.type):
+            dataclass_fields.append((f.name, f.type, False))
+        elif type_name == "List" and is_dataclass(next(iter(f.type.__args__), None)):
+            dataclass_fields.append((f.name, f.type.__args__[0], True))
+    return tuple(set_fields), tuple(dataclass_fields)
+
+
+def _to_builtin(value: Any) -> Any:
+    """
+    Same output as `dataclasses.asdict`, without its `copy.deepcopy` of every
+    immutable value. Sets are stored as sorted lists.
+    """
+    value_type = type(value)
+    if value_type in _IMMUTABLE_TYPES:
+        return value
+    if value_type is list:
+        return [_to_builtin(v) for v in value]
+    if value_type is set:
+        return sorted(value)
+    if value_type is dict:
+        return {k: _to_builtin(v) for k, v in value.items()}
+    if isinstance(value, BaseDataClass):
+        return _to_dict(value)
+    if isinstance(value, (list, tuple)):
+        return value_type(_to_builtin(v) for v in value)
+    return deepcopy(value)
+
+
+def _to_dict(obj) -> dict:
+    return {
+        name: _to_builtin(getattr(obj, name)) for name in _ordered_field_names(type(obj))
+    }
+
+
+def _unpack_values(cls, values: dict):
+    """ unpack dict if field exists for this type """
+    class_fields = _field_names(cls)
+    return cls(**{k: v for k, v in values.items() if k in class_fields})
@@ -1,9 +1,9 @@
 from dataclasses import dataclass, field
 from datetime import datetime
 from enum import IntEnum
-from typing import Optional, List
+from typing import Optional, Set
 
-from ._base import BaseDataClass
+from ._base import BaseDataClass, intern_str
 
 
 class MatchStatus(IntEnum):
@@ -21,8 +21,13 @@ class Match(BaseDataClass):
     created_at: str = field(default=datetime.now().strftime("%m/%d/%Y %H:%M:%S"))
     password: Optional[str] = field(default=None)
     status: MatchStatus = field(default=MatchStatus.PENDING)
-    teams_joined: List[str] = field(default_factory=list)
-    teams_registered: List[str] = field(default_factory=list)
+    teams_joined: Set[str] = field(default_factory=set)
+    teams_registered: Set[str] = field(default_factory=set)
+
+    def __post_init__(self):
+        super().__post_init__()
+        self.name = intern_str(self.name)
+        self.group_name = intern_str(self.group_name)
 
     def __str__(self):
         return (
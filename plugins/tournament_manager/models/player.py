@@ -1,11 +1,23 @@
+from copy import deepcopy
 from dataclasses import dataclass, field
 from typing import Optional, List
 
-from ._base import BaseDataClass
+from ._base import BaseDataClass, add_slots
 
 
+@add_slots
 @dataclass
 class Player(BaseDataClass):
     name: str
     custom_fields: List[str] = field(default_factory=list)
     email: Optional[str] = field(default=None)
+
+    @classmethod
+    def from_lineup(cls, values: dict) -> "Player":
+        """
+        Build a player from a Toornament lineup entry with positional arguments.
+        The custom fields are copied, the entry may be a cached Toornament response
+        """
+        return cls(
+            values["name"], deepcopy(values.get("custom_fields", [])), values.get("email")
+        )
@@ -1,8 +1,39 @@
+import logging
 from dataclasses import dataclass, field
 from datetime import datetime
 from typing import Optional, List
 
-from ._base import BaseDataClass
+from plugins.tournament_manager.utils.timestamps import now_isoformat
+from ._base import BaseDataClass, intern_str
+
+logger = logging.getLogger(__name__)
+
+_CARD_KEYS = (
+    "Match",
+    "Position",
+    "Eliminations",
+    "Calculated Points",
+    "Updated at",
+    "Screenshots",
+)
+_COLOR_GREY = {"color": "grey"}
+# format of the timestamps saved before they were stored as ISO 8601
+_LEGACY_DATETIME_FORMAT = "%m/%d/%Y %H:%M:%S"
+# points earned for a match final position
+_POSITION_POINTS = {
+    1: 15,
+    2: 12,
+    3: 9,
+    4: 9,
+    5: 6,
+    6: 6,
+    7: 6,
+    8: 6,
+    9: 3,
+    10: 3,
+    11: 3,
+    12: 3,
+}
 
 
 @dataclass
@@ -12,47 +43,77 @@ class ScoreSubmission(BaseDataClass):
     screenshot_links: List[str] = field(default_factory=list)
     position: Optional[int] = field(default=None)
     eliminations: Optional[int] = field(default=None)
-    updated_at: str = field(default=datetime.now().strftime("%m/%d/%Y %H:%M:%S"))
+    updated_at: str = field(default_factory=now_isoformat)
+
+    def __post_init__(self):
+        super().__post_init__()
+        self.match_name = intern_str(self.match_name)
+        self._screenshots_cache: Optional[str] = None
+        if self.updated_at:
+            self.updated_at = _to_isoformat(self.updated_at)
+
+    def add_screenshots(self, urls: List[str]):
+        """ Add screenshot urls, ignoring the ones already submitted """
+        known_links = set(self.screenshot_links)
+        for url in urls:
+            if url not in known_links:
+                known_links.add(url)
+                self.screenshot_links.append(url)
+        self._screenshots_cache = None
+
+    def get_updated_at(self) -> str:
+        """ Readable `updated_at`, e.g. `2020-10-31 20:45:10` """
+        return self.updated_at.replace("T", " ")
 
     def get_screenshots(self) -> str:
-        return ", ".join(f"<{u}>" for u in self.screenshot_links)
+        if self._screenshots_cache is None:
+            self._screenshots_cache = ", ".join(
+                ["<" + u + ">" for u in self.screenshot_links]
+            )
+        return self._screenshots_cache
 
     def show_card(self) -> dict:
+        values = (
+            self.match_name,
+            self.position,
+            self.eliminations,
+            self.count_points(),
+            self.get_updated_at(),
+            self.get_screenshots(),
+        )
         return {
             "title": self.team_name,
-            "fields": (
-                ("Match", self.match_name),
-                ("Position", self.position),
-                ("Eliminations", self.eliminations),
-                ("Calculated Points", self.count_points()),
-                ("Updated at", self.updated_at),
-                ("Screenshots", self.get_screenshots()),
-            ),
-            "color": "grey",
+            "fields": tuple(zip(_CARD_KEYS, values)),
+            **_COLOR_GREY,
         }
 
     def count_points(self) -> int:
-        position_points = {
-            1: 15,
-            2: 12,
-            3: 9,
-            4: 9,
-            5: 6,
-            6: 6,
-            7: 6,
-            8: 6,
-            9: 3,
-            10: 3,
-            11: 3,
-            12: 3,
-        }
-        return position_points.get(self.position, 0) + self.eliminations
+        return _POSITION_POINTS.get(self.position, 0) + self.eliminations
 
     def __str__(self):
         return (
             f"```ldif\nPosition:           {self.position}\n"
             f"Eliminations:       {self.eliminations}\n"
-            f"Updated at:         {self.updated_at}\n"
+            f"Updated at:         {self.get_updated_at()}\n"
             f"Calculated points:  {self.count_points()}```"
             + "\n".join(self.screenshot_links)
         )
+
+
+def _to_isoformat(value: str) -> str:
+    """
+    ISO 8601 timestamp, converted from the legacy format if needed. An unknown format
+    is kept as is rather than failing to load the whole tournament
+    """
+    try:
+        datetime.fromisoformat(value)
+        return value
+    except ValueError:
+        pass
+    try:
+        return datetime.strptime(value, _LEGACY_DATETIME_FORMAT).isoformat(
+            timespec="seconds"
+        )
+    except ValueError:
+        logger.warning(f"Unknown score submission timestamp format: {value!r}")
+        return value
@@ -1,10 +1,13 @@
+from copy import deepcopy
 from dataclasses import dataclass, field
 from typing import Optional, List
 
-from ._base import BaseDataClass
+from ._base import BaseDataClass, remove_item
 from .player import Player
 from .score_submission import ScoreSubmission
 
+_CARD_KEYS = ("Team Name", "Team ID", "Team Captain", "Team Players")
+
 
 @dataclass
 class Team(BaseDataClass):
@@ -16,18 +19,72 @@ class Team(BaseDataClass):
     checked_in: Optional[bool] = field(default=None)
     score_submissions: List[ScoreSubmission] = field(default_factory=list)
 
+    def __post_init__(self):
+        super().__post_init__()
+        self._index_submissions()
+
+    @classmethod
+    def from_dict(cls, values: dict) -> "Team":
+        """
+        Team from participant data, which may be a cached Toornament response:
+        the custom fields and lineup are copied rather than shared with it
+        """
+        values = dict(values)
+        if values.get("custom_fields") is not None:
+            values["custom_fields"] = deepcopy(values["custom_fields"])
+        if values.get("lineup") is not None:
+            values["lineup"] = [Player.from_lineup(pl) for pl in values["lineup"]]
+        return super().from_dict(values)
+
+    def add_submission(self, submission: ScoreSubmission):
+        self._sync_submission_index()
+        self.score_submissions.append(submission)
+        self._indexed_submissions_count += 1
+        self._submissions_by_match.setdefault(submission.match_name, submission)
+
     def find_submission_by_match(self, match_name: str) -> Optional[ScoreSubmission]:
-        for s in self.score_submissions:
-            if s.match_name == match_name:
-                return s
-        return None
+        self._sync_submission_index()
+        return self._submissions_by_match.get(match_name)
+
+    def remove_submission(self, submission: ScoreSubmission):
+        remove_item(self.score_submissions, submission)
+        # another submission may share the match name, reindex on next lookup
+        self._indexed_submissions = None
+
+    def update_lineup(self, lineup: List[dict]) -> bool:
+        """ Rebuild the lineup from participant data, only if the players changed """
+        if len(lineup) == len(self.lineup) and all(
+            player.name == pl.get("name")
+            and player.custom_fields == pl.get("custom_fields", [])
+            and player.email == pl.get("email")
+            for player, pl in zip(self.lineup, lineup)
+        ):
+            return False
+
+        self.lineup = [Player.from_lineup(pl) for pl in lineup]
+        return True
 
     def show_card(self) -> dict:
-        return {
-            "fields": (
-                ("Team Name", self.name),
-                ("Team ID", self.id),
-                ("Team Captain", self.captain),
-                ("Team Players", "\n".join(pl.name for pl in self.lineup)),
-            )
+        values = (
+            self.name,
+            self.id,
+            self.captain,
+            "\n".join([pl.name for pl in self.lineup]),
+        )
+        return {"fields": tuple(zip(_CARD_KEYS, values))}
+
+    def _index_submissions(self):
+        """ Index submissions by match name, the first submission wins on duplicates """
+        self._indexed_submissions = self.score_submissions
+        self._indexed_submissions_count = len(self.score_submissions)
+        self._submissions_by_match = {
+            s.match_name: s for s in reversed(self.score_submissions)
         }
+
+    def _sync_submission_index(self):
+        """ Rebuild the index if `score_submissions` was replaced or modified directly """
+        if (
+            self._indexed_submissions is not self.score_submissions
+            or self._indexed_submissions_count != len(self.score_submissions)
+        ):
+            self._index_submissions()
@@ -1,51 +1,154 @@
 from dataclasses import dataclass, field
-from typing import Optional, List
+from typing import Optional, List, Set
 
-from ._base import BaseDataClass
+from ._base import BaseDataClass, intern_str, remove_item
 from .match import Match
 from .score_submission import ScoreSubmission
 from .team import Team
 from .toornament_info import ToornamentInfo
 
+_CARD_KEYS = (
+    "Tournament Alias",
+    "Toornament ID",
+    "Game",
+    "Linked Teams",
+    "Registered Teams",
+    "Bot Channels",
+    "Captain Role",
+    "Tournament Administrator Roles",
+)
+
 
 @dataclass
 class Tournament(BaseDataClass):
     id: int
     alias: str
     info: ToornamentInfo = field(default=None)
-    administrator_roles: List[str] = field(default_factory=list)
+    administrator_roles: Set[str] = field(default_factory=set)
     captain_role: str = field(default=None)
-    channels: List[str] = field(default_factory=list)
+    channels: Set[str] = field(default_factory=set)
     matches: List[Match] = field(default_factory=list)
     teams: List[Team] = field(default_factory=list)
     url: Optional[str] = field(default=None)
+    # fingerprint of the Toornament participants the teams were last refreshed from
+    participants_hash: Optional[str] = field(default=None)
+
+    def __post_init__(self):
+        super().__post_init__()
+        self.alias = intern_str(self.alias)
+        self.captain_role = intern_str(self.captain_role)
+        self._index_matches()
+        self._index_teams()
+
+    def add_admin_role(self, role: str) -> bool:
+        """ Return False if the role is already an administrator role """
+        if role in self.administrator_roles:
+            return False
+        self.administrator_roles.add(role)
+        return True
+
+    def add_channel(self, channel: str) -> bool:
+        """ Return False if the channel is already linked """
+        if channel in self.channels:
+            return False
+        self.channels.add(channel)
+        return True
+
+    def add_match(self, match: Match):
+        self._sync_match_index()
+        self.matches.append(match)
+        self._indexed_matches_count += 1
+        self._matches_by_name.setdefault(match.name, match)
+
+    def add_team(self, team: Team):
+        self._sync_team_index()
+        self.teams.append(team)
+        self._indexed_teams_count += 1
+        self._teams_by_id.setdefault(team.id, team)
+        self._teams_by_name.setdefault(team.name, team)
+        if team.captain is not None:
+            self._teams_by_captain.setdefault(team.captain, team)
 
     def count_linked_teams(self) -> int:
-        return sum([p.captain is not None for p in self.teams])
+        return sum(1 for t in self.teams if t.captain is not None)
 
     def find_match_by_name(self, name: str) -> Optional[Match]:
-        for m in self.matches:
-            if m.name == name:
-                return m
-        return None
+        self._sync_match_index()
+        return self._matches_by_name.get(name)
 
     def find_team_by_captain(self, captain_name: str) -> Optional[Team]:
-        for p in self.teams:
-            if p.captain == captain_name:
-                return p
-        return None
+        self._sync_team_index()
+        return self._teams_by_captain.get(captain_name)
 
     def find_team_by_id(self, team_id: int) -> Optional[Team]:
-        for p in self.teams:
-            if p.id == str(team_id):
-                return p
-        return None
+        self._sync_team_index()
+        return self._teams_by_id.get(str(team_id))
 
     def find_team_by_name(self, team_name: str) -> Optional[Team]:
-        for p in self.teams:
-            if p.name == team_name:
-                return p
-        return None
+        self._sync_team_index()
+        return self._teams_by_name.get(team_name)
+
+    def remove_admin_role(self, role: str) -> bool:
+        """ Return False if the role is not an administrator role """
+        if role not in self.administrator_roles:
+            return False
+        self.administrator_roles.remove(role)
+        return True
+
+    def remove_channel(self, channel: str) -> bool:
+        """ Return False if the channel is not linked """
+        if channel not in self.channels:
+            return False
+        self.channels.remove(channel)
+        return True
+
+    def remove_match(self, match: Match):
+        remove_item(self.matches, match)
+        # another match may share the name, reindex on next lookup
+        self._indexed_matches = None
+
+    def remove_team(self, team: Team):
+        self._sync_team_index()
+        unique = self._has_unique_team_keys()
+        remove_item(self.teams, team)
+        # a refresh must add the team back if it's still a Toornament participant
+        self.participants_hash = None
+        if unique and team.captain is None:
+            self._indexed_teams_count -= 1
+            del self._teams_by_id[team.id]
+            del self._teams_by_name[team.name]
+        else:
+            # another team may share the name or captain, reindex on next lookup
+            self._indexed_teams = None
+
+    def rename_team(self, team: Team, name: str):
+        if team.name == name:
+            return
+        self._sync_team_index()
+        if self._has_unique_team_keys() and name not in self._teams_by_name:
+            del self._teams_by_name[team.name]
+            self._teams_by_name[name] = team
+        else:
+            self._indexed_teams = None
+        team.name = name
+
+    def set_team_captain(self, team: Team, captain_name: Optional[str]) -> bool:
+        """ Return False if the captain is already linked to another team """
+        self._sync_team_index()
+        linked_team = self._teams_by_captain.get(captain_name)
+        if captain_name is not None and linked_team not in (None, team):
+            return False
+        if self._teams_by_captain.get(team.captain) is team:
+            del self._teams_by_captain[team.captain]
+        team.captain = captain_name
+        if captain_name is not None:
+            self._teams_by_captain[captain_name] = team
+        return True
+
+    def get_linked_teams(self) -> List[Team]:
+        """ Teams linked to a captain, read from the captain index """
+        self._sync_team_index()
+        return list(self._teams_by_captain.values())
 
     def get_match_scores(self, match_name: str) -> List[ScoreSubmission]:
         submissions = []
@@ -60,17 +163,63 @@ class Tournament(BaseDataClass):
         return {
             "title": f"{self.alias} ({self.info.name})",
             "link": self.url,
-            "fields": (
-                ("Tournament Alias", str(self.alias)),
-                ("Toornament ID", str(self.info.id)),
-                ("Game", self.info.discipline),
-                ("Linked Teams", str(self.count_linked_teams())),
-                ("Registered Teams", str(len(self.teams))),
-                ("Bot Channels", "\n".join(self.channels) or None),
-                ("Captain Role", f"@{self.captain_role}" if self.captain_role else None),
-                (
-                    "Tournament Administrator Roles",
-                    ", ".join(f"@{r}" for r in self.administrator_roles) or None,
-                ),
+            "fields": tuple(
+                zip(
+                    _CARD_KEYS,
+                    (
+                        str(self.alias),
+                        str(self.info.id),
+                        self.info.discipline,
+                        str(self.count_linked_teams()),
+                        str(len(self.teams)),
+                        "\n".join(sorted(self.channels)) or None,
+                        f"@{self.captain_role}" if self.captain_role else None,
+                        ", ".join([f"@{r}" for r in sorted(self.administrator_roles)])
+                        or None,
+                    ),
+                )
             ),
         }
+
+    def to_dict(self):
+        """ Also persist a `captain -> team id` index to find captains without parsing """
+        values = super().to_dict()
+        self._sync_team_index()
+        values["captains"] = {c: t.id for c, t in self._teams_by_captain.items()}
+        return values
+
+    def _index_matches(self):
+        """ Index matches by name, the first match wins like a linear scan would """
+        self._indexed_matches = self.matches
+        self._indexed_matches_count = len(self.matches)
+        self._matches_by_name = {m.name: m for m in reversed(self.matches)}
+
+    def _index_teams(self):
+        """ Index teams by id, name and captain, the first team wins on duplicates """
+        self._indexed_teams = self.teams
+        self._indexed_teams_count = len(self.teams)
+        self._teams_by_id = {t.id: t for t in reversed(self.teams)}
+        self._teams_by_name = {t.name: t for t in reversed(self.teams)}
+        self._teams_by_captain = {
+            t.captain: t for t in reversed(self.teams) if t.captain is not None
+        }
+
+    def _has_unique_team_keys(self) -> bool:
+        """ No two teams share an id or a name, the index can be updated in place """
+        return len(self._teams_by_id) == len(self._teams_by_name) == len(self.teams)
+
+    def _sync_match_index(self):
+        """ Rebuild the index if `matches` was replaced or modified directly """
+        if (
+            self._indexed_matches is not self.matches
+            or self._indexed_matches_count != len(self.matches)
+        ):
+            self._index_matches()
+
+    def _sync_team_index(self):
+        """ Rebuild the index if `teams` was replaced or modified directly """
+        if (
+            self._indexed_teams is not self.teams
+            or self._indexed_teams_count != len(self.teams)
+        ):
+            self._index_teams()
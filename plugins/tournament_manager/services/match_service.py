@@ -9,6 +9,8 @@ from plugins.tournament_manager.errors import (
     GenericError,
 )
 
+_STATUS_NAMES = frozenset(MatchStatus.__members__)
+
 
 class MatchService:
     def __init__(self, toornament_client: ToornamentAPIClient):
@@ -32,9 +34,9 @@ class MatchService:
                 raise MatchIDNotFound(match_id)
 
             match.group_name = match_info["public_notes"]
-            match.teams_registered = [
+            match.teams_registered = {
                 p["participant"]["id"] for p in match_info["opponents"]
-            ]
+            }
 
         return match
 
@@ -50,17 +52,17 @@ class MatchService:
         if match.status != MatchStatus.PENDING:
             raise GenericError(f"Can't join match with status `{match.status.name}`")
 
-        if str(team_id) not in match.teams_joined:
-            match.teams_joined.append(str(team_id))
+        match.teams_joined.add(str(team_id))
 
         return match
 
     @staticmethod
     def set_match_status(match: Match, status: str) -> Match:
-        if not hasattr(MatchStatus, status.upper()):
+        key = status.upper()
+        if key not in _STATUS_NAMES:
             raise InvalidMatchStatus(status)
 
-        match.status = MatchStatus[status.upper()]
+        match.status = MatchStatus[key]
         return match
 
     @staticmethod
@@ -1,5 +1,8 @@
-from datetime import datetime
-from typing import Optional, List
+import hashlib
+import json
+from copy import deepcopy
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, List, Tuple
 
 from plugins.tournament_manager.clients.toornament_api_client import ToornamentAPIClient
 from plugins.tournament_manager.models import (
@@ -11,8 +14,10 @@ from plugins.tournament_manager.models import (
     MatchStatus,
     ScoreSubmission,
 )
+from plugins.tournament_manager.utils.timestamps import now_isoformat
 from plugins.tournament_manager.errors import (
     ErrorFetchingParticipantData,
+    ErrorFetchingParticipants,
     TournamentChannelExists,
     TournamentChannelNotFound,
     TournamentIDNotFound,
@@ -26,15 +31,23 @@ from plugins.tournament_manager.errors import (
 )
 
 
+def _hash_participants(participants: List[dict]) -> str:
+    """ Fingerprint of a Toornament participants list """
+    return hashlib.blake2b(
+        json.dumps(participants, sort_keys=True).encode(), digest_size=8
+    ).hexdigest()
+
+
 class TournamentService:
     def __init__(self, toornament_client: ToornamentAPIClient):
         self.toornament_client = toornament_client
+        # fetches Toornament resources concurrently
+        self._executor = ThreadPoolExecutor(max_workers=4)
 
     @staticmethod
     def add_channel(tournament: Tournament, channel: str) -> Tournament:
-        if channel in tournament.channels:
-            raise TournamentChannelExists(channel, tournament)
-        tournament.channels.append(channel)
+        if not tournament.add_channel(channel):
+            raise TournamentChannelExists(channel, tournament.alias)
         return tournament
 
     def add_screenshot(
@@ -58,8 +71,8 @@ class TournamentService:
                 "Use `!submit [match_name] position [number] "
                 "eliminations [number]` to submit your score.\n",
             )
-        score.screenshot_links.extend(urls)
-        score.updated_at = datetime.now().strftime("%m/%d/%Y %H:%M:%S")
+        score.add_screenshots(urls)
+        score.updated_at = now_isoformat()
 
         return score
 
@@ -108,15 +121,18 @@ class TournamentService:
             position=position,
             eliminations=eliminations,
         )
-        team.score_submissions.append(score)
+        team.add_submission(score)
 
         return score
 
     def create_tournament(self, tournament_id: int, alias: str) -> Tournament:
-        # Get Toornament info
-        toornament_info = self.toornament_client.get_tournament(tournament_id)
+        toornament_info, toornament_participants = self._fetch_toornament_data(
+            tournament_id
+        )
         if not toornament_info:
             raise TournamentIDNotFound(tournament_id)
+        if toornament_participants is None:
+            raise ErrorFetchingParticipants(tournament_id)
 
         tournament = Tournament(
             id=tournament_id,
@@ -124,107 +140,70 @@ class TournamentService:
             url=f"https://www.toornament.com/en_US/tournaments/"
             f"{tournament_id}/information",
             info=ToornamentInfo.from_dict(toornament_info),
+            # the teams are indexed once on init
+            teams=[Team.from_dict(participant) for participant in toornament_participants],
+            participants_hash=_hash_participants(toornament_participants),
         )
 
-        # Get Toornament participants
-        toornament_participants = self.toornament_client.get_participants(tournament_id)
-        tournament.teams = [Team.from_dict(p) for p in toornament_participants]
-
         return tournament
 
-    @staticmethod
-    def find_match_by_name(tournament: Tournament, match_name: str) -> Optional[Match]:
-        for match in tournament.matches:
-            if match.name == match_name:
-                return match
-        return None
-
-    @staticmethod
-    def find_team_by_name(tournament: Tournament, team_name: str) -> Optional[Team]:
-        for t in tournament.teams:
-            if t.name == team_name:
-                return t
-        return None
-
-    @staticmethod
-    def find_team_by_id(tournament: Tournament, team_id: int) -> Optional[Team]:
-        for p in tournament.teams:
-            if p.id == str(team_id):
-                return p
-        return None
-
-    def find_captain_tournament_alias(
-        self, tournaments: dict, captain_name: str
-    ) -> Optional[str]:
-        """
-        Return the alias of the tournament for which the captain_name is linked to a team
-        """
-        for t in tournaments.values():
-            tournament = Tournament.from_dict(t)
-            team = self.find_captain_team(tournament, captain_name)
-            if team:
-                return tournament.alias
-
-    def get_captain_tournament_alias(self, tournaments: dict, captain_name: str) -> str:
-        alias = self.find_captain_tournament_alias(tournaments, captain_name)
-        if not alias:
-            raise PermissionDeniedNotTeamCaptain()
-        return alias
-
-    def find_captain_team(
-        self, tournament: Tournament, captain_name: str
-    ) -> Optional[Team]:
-        for team in tournament.teams:
-            if team.captain == captain_name:
-                return team
-        return None
-
     def get_captain_team(self, tournament: Tournament, captain_name: str) -> Team:
-        team = self.find_captain_team(tournament, captain_name)
+        team = tournament.find_team_by_captain(captain_name)
         if not team:
             raise PermissionDeniedNotTeamCaptain()
         return team
 
     def get_match_by_name(self, tournament: Tournament, match_name: str) -> Match:
-        match = self.find_match_by_name(tournament, match_name)
+        match = tournament.find_match_by_name(match_name)
         if not match:
             raise TournamentMatchNameNotFound(match_name)
 
         return match
 
     def get_team_by_id(self, tournament: Tournament, team_id: int) -> Team:
-        team = self.find_team_by_id(tournament, team_id)
+        team = tournament.find_team_by_id(team_id)
         if not team:
             raise TournamentTeamIDNotFound(team_id)
         return team
 
     def get_team_by_name(self, tournament: Tournament, team_name: str) -> Team:
-        team = self.find_team_by_name(tournament, team_name)
+        team = tournament.find_team_by_name(team_name)
         if not team:
             raise TournamentTeamNameNotFound(team_name)
         return team
 
     def refresh_tournament(self, tournament: Tournament) -> Tournament:
+        # an explicit refresh always fetches the latest Toornament data
+        self.toornament_client.invalidate("tournament", tournament.id)
+        self.toornament_client.invalidate("participants", tournament.id)
+
         # update data fetched on Toornament
-        info = self.toornament_client.get_tournament(tournament.id)
+        info, participants = self._fetch_toornament_data(tournament.id)
         if not info:
             raise TournamentIDNotFound(tournament.id)
+        # keep the current teams rather than updating them from an incomplete list
+        if participants is None:
+            raise ErrorFetchingParticipants(tournament.id)
 
         # Override current tournament info
         tournament.info = ToornamentInfo.from_dict(info)
 
-        # update participants list
-        participants = self.toornament_client.get_participants(tournament.id)
+        # update participants list, unless unchanged since the last refresh
+        participants_hash = _hash_participants(participants)
+        if participants_hash == tournament.participants_hash:
+            return tournament
+
         for participant in participants:
-            team = self.find_team_by_id(tournament, participant["id"])
+            team = tournament.find_team_by_id(participant["id"])
             if team:
                 # Update participant name and lineup
-                team.name = participant["name"]
-                team.lineup = [Player(**pl) for pl in participant.get("lineup", [])]
+                tournament.rename_team(team, participant["name"])
+                team.update_lineup(participant.get("lineup", []))
                 team.checked_in = participant.get("checked_in")
             else:
                 # Add new participant
-                tournament.teams.append(Team.from_dict(participant))
+                tournament.add_team(Team.from_dict(participant))
+        tournament.participants_hash = participants_hash
 
         return tournament
 
@@ -235,18 +214,31 @@ class TournamentService:
         if not participant:
             raise ErrorFetchingParticipantData(team_id, tournament.alias)
 
-        team.captain = None
-        team.lineup = [Player.from_dict(pl) for pl in participant["lineup"]]
-        team.custom_fields = participant["custom_fields"]
-        team.checked_in = participant.get("checked_in")
-
+        self._reset_team(tournament, team, participant)
         return team
 
+    def reset_tournament_teams(
+        self, tournament: Tournament, team_ids: List[int]
+    ) -> List[Team]:
+        """ Reset multiple teams, fetching their participant data in a single batch """
+        teams = [self.get_team_by_id(tournament, team_id) for team_id in team_ids]
+
+        participants = self.toornament_client.get_participants_by_ids(
+            tournament.id, [int(team.id) for team in teams]
+        )
+        for team, participant in zip(teams, participants):
+            if not participant:
+                raise ErrorFetchingParticipantData(team.id, tournament.alias)
+
+        for team, participant in zip(teams, participants):
+            self._reset_team(tournament, team, participant)
+
+        return teams
+
     @staticmethod
     def remove_admin_role(tournament: Tournament, role: str) -> Tournament:
-        if role not in tournament.administrator_roles:
+        if not tournament.remove_admin_role(role):
             raise TournamentRoleNotFound(role)
-        tournament.administrator_roles.remove(role)
         return tournament
 
     @staticmethod
@@ -256,14 +248,13 @@ class TournamentService:
 
     def remove_match(self, tournament: Tournament, match_name: str) -> Tournament:
         match = self.get_match_by_name(tournament, match_name)
-        tournament.matches.remove(match)
+        tournament.remove_match(match)
         return tournament
 
     @staticmethod
-    def remove_channel(tournament, channel) -> Tournament:
-        if channel not in tournament.channels:
+    def remove_channel(tournament: Tournament, channel: str) -> Tournament:
+        if not tournament.remove_channel(channel):
             raise TournamentChannelNotFound(channel)
-        tournament.channels.remove(channel)
         return tournament
 
     def link_team_captain(
@@ -273,7 +264,9 @@ class TournamentService:
         if team.captain is not None:
             raise TournamentTeamCaptainExists(team_name, team.captain)
 
-        team.captain = captain_name
+        if not tournament.set_team_captain(team, captain_name):
+            linked_team = tournament.find_team_by_captain(captain_name)
+            raise TournamentTeamCaptainExists(linked_team.name, captain_name)
         return team
 
     @staticmethod
@@ -283,5 +276,24 @@ class TournamentService:
 
     def remove_tournament_team(self, tournament: Tournament, team_id: int) -> Team:
         team = self.get_team_by_id(tournament, team_id)
-        tournament.teams.remove(team)
+        tournament.remove_team(team)
         return team
+
+    def _fetch_toornament_data(
+        self, tournament_id: int
+    ) -> Tuple[dict, Optional[List[dict]]]:
+        """ Get Toornament info and participants concurrently """
+        info_future = self._executor.submit(
+            self.toornament_client.get_tournament, tournament_id
+        )
+        participants_future = self._executor.submit(
+            self.toornament_client.get_participants, tournament_id
+        )
+        return info_future.result(), participants_future.result()
+
+    @staticmethod
+    def _reset_team(tournament: Tournament, team: Team, participant: dict):
+        tournament.set_team_captain(team, None)
+        team.lineup = [Player.from_lineup(pl) for pl in participant["lineup"]]
+        team.custom_fields = deepcopy(participant["custom_fields"])
+        team.checked_in = participant.get("checked_in")
@@ -0,0 +1,43 @@
+import os
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+from unittest.mock import Mock
+
+from plugins.tournament_manager.clients.toornament_api_client import ToornamentAPIClient
+from ..utils import load_resource
+
+_CONFIG = """[Toornament]
+TOORNAMENT_API_URL = https://api.toornament.test
+TOORNAMENT_API_KEY = key
+TOORNAMENT_CLIENT_ID = id
+TOORNAMENT_CLIENT_SECRET = secret
+"""
+
+
+class TestToornamentAPIClient(TestCase):
+    def setUp(self):
+        with TemporaryDirectory() as directory:
+            config_file = os.path.join(directory, "config.ini")
+            with open(config_file, "w") as f:
+                f.write(_CONFIG)
+            self.client = ToornamentAPIClient(config_file)
+        self.client._session = Mock()
+
+    def test_get_participants_returns_copies(self):
+        participants = Mock(
+            status_code=206,
+            headers={"Content-Range": "participants 0-3/4", "ETag": '"v1"'},
+        )
+        participants.json.side_effect = lambda: load_resource("get_participants.json")
+        self.client._session.request.return_value = participants
+
+        self.client.get_participants(1)[0]["name"] = "Changed"
+        # cached response
+        self.assertEqual("Team A", self.client.get_participants(1)[0]["name"])
+
+        self.client.get_participants(1)[0]["lineup"].clear()
+        self.client.invalidate()
+        self.client._session.request.return_value = Mock(status_code=304, headers={})
+        # conditional request, not modified since the first response
+        self.assertEqual(3, len(self.client.get_participants(1)[0]["lineup"]))
+        self.assertEqual(2, self.client._session.request.call_count)
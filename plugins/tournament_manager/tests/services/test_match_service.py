@@ -2,7 +2,7 @@ from unittest import TestCase
 from unittest.mock import Mock
 
 from ...models import Match, MatchStatus
-from plugins.tournament_manager.errors import GenericError
+from plugins.tournament_manager.errors import GenericError, InvalidMatchStatus
 from ...services.match_service import MatchService
 
 
@@ -36,3 +36,14 @@ class TestMatchService(TestCase):
         match.status = MatchStatus.PENDING
         match_service.join_match(match, 2, "name")
         self.assertEqual(2, len(match.teams_joined))
+
+    def test_set_match_status(self):
+        match = Match(name="Match", created_by="testUser")
+        self.assertEqual(MatchStatus.PENDING, match.status)
+
+        self.assertRaises(
+            InvalidMatchStatus, MatchService.set_match_status, match, "unknown"
+        )
+
+        MatchService.set_match_status(match, "completed")
+        self.assertEqual(MatchStatus.COMPLETED, match.status)
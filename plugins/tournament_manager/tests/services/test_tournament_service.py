@@ -7,8 +7,11 @@ from ...models import Tournament, Player, Match
 from plugins.tournament_manager.errors import (
     TournamentTeamIDNotFound,
     ErrorFetchingParticipantData,
+    ErrorFetchingParticipants,
     TournamentRoleNotFound,
     TournamentMatchNameNotFound,
+    TournamentTeamCaptainExists,
+    GenericError,
 )
 
 
@@ -55,6 +58,26 @@ class TestTournamentService(TestCase):
             99,
         )
 
+    def test_create_tournament_copies_participants(self):
+        get_participants = load_resource("get_participants.json")
+        toornament_c_mock = Mock()
+        toornament_c_mock.get_tournament.return_value = load_resource(
+            "get_tournament.json"
+        )
+        # the participants may be a cached Toornament response
+        toornament_c_mock.get_participants.return_value = get_participants
+        tournament_service = TournamentService(toornament_c_mock)
+
+        tournament = tournament_service.create_tournament(1, "Test Tournament")
+        team = tournament.find_team_by_id(1)
+        team.custom_fields["seat"] = "A1"
+        team.lineup[0].custom_fields["seat_id"] = "Z1"
+
+        self.assertEqual({}, get_participants[0]["custom_fields"])
+        self.assertEqual(
+            {"seat_id": "K9"}, get_participants[0]["lineup"][0]["custom_fields"]
+        )
+
     def test_reset_tournament_team(self):
         tournament = self._create_default_tournament()
         team = tournament.teams[0]
@@ -90,6 +113,39 @@ class TestTournamentService(TestCase):
 
         self.assertIsNone(team.captain)
         self.assertEqual(2, len(team.lineup))
+        team.custom_fields["seat"] = "A1"
+        self.assertEqual({}, get_participant["custom_fields"])
+
+    def test_reset_tournament_teams(self):
+        tournament = self._create_default_tournament()
+        tournament_service = TournamentService(Mock())
+        for team in tournament.teams[:2]:
+            tournament_service.link_team_captain(tournament, team.name, team.name)
+        self.assertEqual(2, tournament.count_linked_teams())
+
+        toornament_c_mock = Mock()
+        tournament_service = TournamentService(toornament_c_mock)
+        get_participant = load_resource("get_participant.json")
+
+        toornament_c_mock.get_participants_by_ids.return_value = [get_participant, {}]
+        self.assertRaises(
+            ErrorFetchingParticipantData,
+            tournament_service.reset_tournament_teams,
+            tournament,
+            [1, 2],
+        )
+        self.assertEqual(2, tournament.count_linked_teams())
+
+        toornament_c_mock.get_participants_by_ids.return_value = [
+            get_participant,
+            get_participant,
+        ]
+        teams = tournament_service.reset_tournament_teams(tournament, [1, 2])
+
+        toornament_c_mock.get_participants_by_ids.assert_called_with(tournament.id, [1, 2])
+        self.assertEqual(["1", "2"], [team.id for team in teams])
+        self.assertEqual(0, tournament.count_linked_teams())
+        self.assertEqual(2, len(teams[1].lineup))
 
     def test_remove_admin_role(self):
         tournament_service = TournamentService(Mock())
@@ -132,6 +188,168 @@ class TestTournamentService(TestCase):
         tournament_service.remove_match(tournament, match_name)
         self.assertEqual(0, len(tournament.matches))
 
+    def test_link_team_captain(self):
+        tournament = self._create_default_tournament()
+        tournament_service = TournamentService(Mock())
+        self.assertEqual(0, tournament.count_linked_teams())
+
+        team = tournament_service.link_team_captain(tournament, "Team B", "Captain")
+
+        self.assertEqual("Captain", team.captain)
+        self.assertIs(team, tournament_service.get_captain_team(tournament, "Captain"))
+        self.assertEqual(1, tournament.count_linked_teams())
+        self.assertRaises(
+            TournamentTeamCaptainExists,
+            tournament_service.link_team_captain,
+            tournament,
+            "Team B",
+            "Other Captain",
+        )
+        # a captain can't be linked to two teams
+        self.assertRaises(
+            TournamentTeamCaptainExists,
+            tournament_service.link_team_captain,
+            tournament,
+            "Team C",
+            "Captain",
+        )
+        self.assertIsNone(tournament.find_team_by_name("Team C").captain)
+        self.assertIs(team, tournament.find_team_by_captain("Captain"))
+
+    def test_count_linked_teams_shared_captain(self):
+        tournament = self._create_default_tournament()
+        # stored before a captain was rejected on a second team
+        tournament.teams[0].captain = "Captain"
+        tournament.teams[1].captain = "Captain"
+        tournament = Tournament.from_dict(tournament.to_dict())
+
+        self.assertEqual(2, tournament.count_linked_teams())
+
+    def test_refresh_tournament_unchanged(self):
+        tournament = self._create_default_tournament()
+        team = tournament.find_team_by_id(1)
+        team.checked_in = True
+
+        toornament_c_mock = Mock()
+        toornament_c_mock.get_tournament.return_value = load_resource(
+            "get_tournament.json"
+        )
+        toornament_c_mock.get_participants.return_value = load_resource(
+            "get_participants.json"
+        )
+        TournamentService(toornament_c_mock).refresh_tournament(tournament)
+
+        # same participants as on creation, teams are left untouched
+        self.assertTrue(team.checked_in)
+
+    def test_refresh_tournament(self):
+        tournament = self._create_default_tournament()
+        tournament_service = TournamentService(Mock())
+        tournament_service.remove_tournament_team(tournament, 4)
+
+        participants = load_resource("get_participants.json")
+        participants[0]["name"] = "Team A Renamed"
+        participants[1]["lineup"].pop()
+        unchanged_lineup = tournament.find_team_by_id(3).lineup
+        toornament_c_mock = Mock()
+        toornament_c_mock.get_tournament.return_value = load_resource(
+            "get_tournament.json"
+        )
+        toornament_c_mock.get_participants.return_value = participants
+        tournament_service = TournamentService(toornament_c_mock)
+
+        tournament_service.refresh_tournament(tournament)
+
+        self.assertEqual(4, len(tournament.teams))
+        self.assertIsNotNone(tournament.find_team_by_id(4))
+        self.assertIsNone(tournament.find_team_by_name("Team A"))
+        self.assertEqual("1", tournament.find_team_by_name("Team A Renamed").id)
+        self.assertEqual(1, len(tournament.find_team_by_id(2).lineup))
+        self.assertIs(unchanged_lineup, tournament.find_team_by_id(3).lineup)
+
+    def test_refresh_tournament_swapped_names(self):
+        tournament = self._create_default_tournament()
+        participants = load_resource("get_participants.json")
+        participants[0]["name"], participants[1]["name"] = "Team B", "Team A"
+        toornament_c_mock = Mock()
+        toornament_c_mock.get_tournament.return_value = load_resource(
+            "get_tournament.json"
+        )
+        toornament_c_mock.get_participants.return_value = participants
+
+        TournamentService(toornament_c_mock).refresh_tournament(tournament)
+
+        self.assertEqual("2", tournament.find_team_by_name("Team A").id)
+        self.assertEqual("1", tournament.find_team_by_name("Team B").id)
+
+    def test_refresh_tournament_incomplete_participants(self):
+        tournament = self._create_default_tournament()
+        participants_hash = tournament.participants_hash
+        toornament_c_mock = Mock()
+        toornament_c_mock.get_tournament.return_value = load_resource(
+            "get_tournament.json"
+        )
+        # a page of participants couldn't be fetched
+        toornament_c_mock.get_participants.return_value = None
+        tournament_service = TournamentService(toornament_c_mock)
+
+        with self.assertRaises(ErrorFetchingParticipants):
+            tournament_service.refresh_tournament(tournament)
+
+        self.assertEqual(4, len(tournament.teams))
+        self.assertEqual(participants_hash, tournament.participants_hash)
+
+    def test_submit_score(self):
+        tournament = self._create_default_tournament()
+        tournament.add_match(Match(name="Match", created_by="Test"))
+        tournament_service = TournamentService(Mock())
+
+        score = tournament_service.submit_score(tournament, "Match", 1, ["url"], 2, 5)
+
+        team = tournament.find_team_by_id(1)
+        self.assertIs(score, team.find_submission_by_match("Match"))
+        self.assertRaises(
+            GenericError,
+            tournament_service.submit_score,
+            tournament,
+            "Match",
+            1,
+            [],
+            1,
+            1,
+        )
+
+        team.remove_submission(score)
+        self.assertIsNone(team.find_submission_by_match("Match"))
+
+    def test_add_screenshot(self):
+        tournament = self._create_default_tournament()
+        tournament.add_match(Match(name="Match", created_by="Test"))
+        tournament_service = TournamentService(Mock())
+        tournament_service.submit_score(tournament, "Match", 1, ["url1"], 2, 5)
+
+        score = tournament_service.add_screenshot(
+            tournament, "Match", 1, ["url1", "url2", "url2"]
+        )
+        self.assertEqual(["url1", "url2"], score.screenshot_links)
+        self.assertEqual("<url1>, <url2>", score.get_screenshots())
+
+    def test_load_score_timestamps(self):
+        tournament = self._create_default_tournament()
+        tournament.add_match(Match(name="Match", created_by="Test"))
+        TournamentService(Mock()).submit_score(tournament, "Match", 1, ["url"], 2, 5)
+        values = tournament.to_dict()
+        submissions = values["teams"][0]["score_submissions"]
+
+        for stored, loaded in (
+            ("2020-10-31T20:45:10", "2020-10-31T20:45:10"),
+            ("10/31/2020 20:45:10", "2020-10-31T20:45:10"),
+            ("yesterday", "yesterday"),
+        ):
+            submissions[0]["updated_at"] = stored
+            team = Tournament.from_dict(values).find_team_by_id(1)
+            self.assertEqual(loaded, team.score_submissions[0].updated_at)
+
     @staticmethod
     def _create_default_tournament(alias: str = "Test Tournament") -> Tournament:
         get_tournament = load_resource("get_tournament.json")
@@ -1,6 +1,14 @@
 import json
+from copy import deepcopy
+from functools import lru_cache
 
 
 def load_resource(filename: str):
+    """ Return a copy of a parsed resource, tests are free to mutate it """
+    return deepcopy(_read_resource(filename))
+
+
+@lru_cache(maxsize=None)
+def _read_resource(filename: str):
     with open(f"plugins/tournament_manager/tests/resources/{filename}") as f:
         return json.load(f)
@@ -1,12 +1,15 @@
 import csv
+import io
 import itertools
 import logging
-import os
-import tempfile
+import threading
+import time
+from concurrent.futures import Future
 from contextlib import contextmanager
 from datetime import datetime
-from time import sleep
-from typing import List, Optional, Tuple
+from functools import partial
+from operator import attrgetter, itemgetter
+from typing import Callable, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple, Union
 
 import discord
 from errbot import BotPlugin, Message, arg_botcmd, botcmd
@@ -24,25 +27,69 @@ from plugins.tournament_manager.models import (
     Team,
     Tournament,
 )
-from plugins.tournament_manager.errors import AppError, TournamentNotFound
+from plugins.tournament_manager.errors import (
+    AppError,
+    PermissionDeniedNotTeamCaptain,
+    TournamentNotFound,
+    TournamentTeamCaptainExists,
+)
 from plugins.tournament_manager.services.match_service import MatchService
 from plugins.tournament_manager.services.tournament_service import TournamentService
-from plugins.tournament_manager.utils.chunks import chunks
+from plugins.tournament_manager.utils.chunks import chunks, join_chunks, n_chunks
 
 logger = logging.getLogger(__name__)
 
+# seconds a user tournament admin permission is cached
+ADMIN_CACHE_TTL = 30
+# seconds the members of a Discord role are cached
+ROLE_MEMBERS_CACHE_TTL = 30
+# seconds between two writes of the updated tournaments to storage
+PERSIST_INTERVAL = 1
+# number of updated tournaments written right away instead of on the next interval
+PERSIST_MAX_PENDING = 8
+# commands handled when sent with an attachment
+SUBMIT_CMDS = frozenset({"!submit", "!add", "!add_screenshot"})
+
 
 @contextmanager
 def update_tournament(tournament_manager_plugin, alias):
-    """ Get a TournamentManagerPlugin tournament, update and save """
-    if alias not in tournament_manager_plugin["tournaments"]:
-        raise TournamentNotFound(alias)
-    tournament = Tournament.from_dict(tournament_manager_plugin["tournaments"][alias])
+    """
+    Get a TournamentManagerPlugin tournament, update and save. Other updates of the
+    tournament wait until it's saved
+    """
+    with tournament_manager_plugin._tournament_lock(alias):
+        tournament = tournament_manager_plugin._get_tournament(alias)
+        if tournament is None:
+            raise TournamentNotFound(alias)
+
+        try:
+            yield tournament
+        except BaseException:
+            # the cached tournament may be partially updated, reload it from storage
+            tournament_manager_plugin._tournament_cache.pop(alias, None)
+            raise
+
+        tournament_manager_plugin._save_tournament(alias, tournament)
+
+
+@contextmanager
+def update_match(tournament_manager_plugin, alias, match_name):
+    """ Same as `update_tournament` when only a match changes, saving only this match """
+    with tournament_manager_plugin._tournament_lock(alias):
+        tournament = tournament_manager_plugin._get_tournament(alias)
+        if tournament is None:
+            raise TournamentNotFound(alias)
+        match = tournament_manager_plugin.tournament_service.get_match_by_name(
+            tournament, match_name
+        )
 
-    yield tournament
+        try:
+            yield tournament, match
+        except BaseException:
+            tournament_manager_plugin._tournament_cache.pop(alias, None)
+            raise
 
-    with tournament_manager_plugin.mutable("tournaments") as tournaments:
-        tournaments.update({alias: tournament.to_dict()})
+        tournament_manager_plugin._save_tournament(alias, tournament, match)
 
 
 class TournamentManagerPlugin(BotPlugin):
@@ -53,12 +100,38 @@ class TournamentManagerPlugin(BotPlugin):
         self.toornament_api_client = ToornamentAPIClient()
         self.tournament_service = TournamentService(self.toornament_api_client)
         self.match_service = MatchService(self.toornament_api_client)
+        # alias -> Tournament, parsed once from storage and kept in sync on save
+        self._tournament_cache: Dict[str, Tournament] = {}
+        # alias -> last serialized form of the cached tournament
+        self._serialized_tournaments: Dict[str, dict] = {}
+        # aliases of the tournaments updated but not yet written to storage
+        self._pending_writes: Set[str] = set()
+        self._pending_writes_lock = threading.Lock()
+        # alias -> lock held while a command updates and saves the tournament
+        self._tournament_locks: Dict[str, threading.RLock] = {}
+        self._tournament_locks_lock = threading.Lock()
+        # captain fullname -> alias of the tournament of their team, built on first use
+        self._captain_index: Optional[Dict[str, str]] = None
+        # user fullname -> (monotonic time checked, is tournament admin)
+        self._admin_cache: Dict[str, Tuple[float, bool]] = {}
+        # role name -> (monotonic time fetched, role member names)
+        self._role_members_cache: Dict[str, Tuple[float, List[str]]] = {}
+        # administrator roles of every tournament, built on first use
+        self._admin_roles: Optional[FrozenSet[str]] = None
+        # (number of bot commands, help messages)
+        self._help_messages: Optional[Tuple[int, Tuple[str, str, str]]] = None
 
     def activate(self):
         """ Triggers on plugin activation """
         super(TournamentManagerPlugin, self).activate()
         if "tournaments" not in self:
             self["tournaments"] = {}
+        self.start_poller(PERSIST_INTERVAL, self._flush_pending_writes)
+
+    def deactivate(self):
+        """ Triggers on plugin deactivation """
+        self._flush_pending_writes()
+        super(TournamentManagerPlugin, self).deactivate()
 
     @arg_botcmd("role", type=str, nargs="+")
     @arg_botcmd("alias", type=str, admin_only=True)
@@ -74,15 +147,15 @@ class TournamentManagerPlugin(BotPlugin):
 
         try:
             with update_tournament(self, alias) as tournament:
-                if role in tournament.administrator_roles:
+                if not tournament.add_admin_role(role):
                     return (
                         f"Role `{role}` is already a tournament administrator role "
                         f"of `{tournament.alias}`"
                     )
-                tournament.administrator_roles.append(role)
         except AppError as err:
             return err
 
+        self._clear_admin_cache()
         return (
             f"Role `{role}` successfully added " f"to the tournament `{tournament.alias}`"
         )
@@ -138,7 +211,7 @@ class TournamentManagerPlugin(BotPlugin):
         """
         [Admin] `!add tournament fortnite 123456789`
         """
-        if alias in self["tournaments"]:
+        if alias in self._get_stored_tournaments():
             return "Tournament with this alias already exists."
 
         try:
@@ -146,7 +219,10 @@ class TournamentManagerPlugin(BotPlugin):
         except AppError as err:
             return err
 
-        self._save_tournament(alias, tournament)
+        with self._tournament_lock(alias):
+            if self._get_tournament(alias) is not None:
+                return "Tournament with this alias already exists."
+            self._save_tournament(alias, tournament)
         self.send(msg.frm, f"Tournament `{tournament.info.name}` successfully added")
 
     @arg_botcmd("match_id", type=int, nargs="?")
@@ -159,20 +235,26 @@ class TournamentManagerPlugin(BotPlugin):
         [Admin] Create a tournament match.
         E.g. `!create match fortnite match_1 secretPassword 123456789`
         """
+        tournament = self._get_tournament(alias)
+        if tournament is None:
+            return "Tournament not found"
+
+        if tournament.find_match_by_name(match_name):
+            return "Match name already exists"
+
         try:
+            # fetch the Toornament match before loading the tournament to update
+            match = self.match_service.create_match(
+                tournament_id=tournament.id,
+                match_id=match_id,
+                match_name=match_name,
+                created_by=msg.frm.fullname,
+                password=password,
+            )
             with update_tournament(self, alias) as tournament:
-                match = self.tournament_service.find_match_by_name(tournament, match_name)
-                if match:
+                if tournament.find_match_by_name(match_name):
                     return "Match name already exists"
-
-                match = self.match_service.create_match(
-                    tournament_id=tournament.id,
-                    match_id=match_id,
-                    match_name=match_name,
-                    created_by=msg.frm.fullname,
-                    password=password,
-                )
-                tournament.matches.append(match)
+                tournament.add_match(match)
         except AppError as err:
             return err
 
@@ -187,10 +269,10 @@ class TournamentManagerPlugin(BotPlugin):
         [Admin] Download a match score submissions.
         E.g. `!download match scores fortnite match_1`
         """
-        if alias not in self["tournaments"]:
+        tournament = self._get_tournament(alias)
+        if tournament is None:
             return "Tournament not found"
 
-        tournament = self._get_tournament(alias)
         match = tournament.find_match_by_name(match_name)
         if not match:
             return f"Match `{match_name}` not found."
@@ -199,41 +281,43 @@ class TournamentManagerPlugin(BotPlugin):
         if not match_scores:
             return "No score submissions found for this match."
 
-        # create temporary csv to send
-        fd, path = tempfile.mkstemp(
-            prefix=f"{match_name}_scores_{datetime.now().strftime('%m-%d-%Y_%H-%M-%S')}_",
-            suffix=".csv",
-        )
         try:
-            with open(path, "w") as csvfile:
-                fw = csv.writer(csvfile, delimiter=",")
-                fw.writerow(
-                    [
-                        "Team Name",
-                        "Updated at",
-                        "Position",
-                        "Eliminations",
-                        "Points",
-                        "Screenshots",
-                    ]
-                )
-                for ms in match_scores:
-                    fw.writerow(
-                        [
-                            ms.team_name,
-                            ms.updated_at,
-                            ms.position,
-                            ms.eliminations,
-                            ms.count_points(),
-                            " ".join(ms.screenshot_links),
-                        ]
+            # build the csv in memory and send it as an attachment
+            csvfile = io.StringIO()
+            fw = csv.writer(csvfile, delimiter=",")
+            fw.writerow(
+                [
+                    "Team Name",
+                    "Updated at",
+                    "Position",
+                    "Eliminations",
+                    "Points",
+                    "Screenshots",
+                ]
+            )
+            fw.writerows(
+                [
+                    (
+                        ms.team_name,
+                        ms.updated_at,
+                        ms.position,
+                        ms.eliminations,
+                        ms.count_points(),
+                        " ".join(ms.screenshot_links),
                     )
-            self._bot.send_file(self.build_identifier(msg.frm.fullname), filepath=path)
+                    for ms in match_scores
+                ]
+            )
+
+            self._bot.send_file(
+                self.build_identifier(msg.frm.fullname),
+                io.BytesIO(csvfile.getvalue().encode()),
+                filename=f"{match_name}_scores_"
+                f"{datetime.now().strftime('%m-%d-%Y_%H-%M-%S')}.csv",
+            )
         except Exception as e:
             logger.error(e)
             return f"Error: {e}"
-        finally:
-            os.remove(path)
 
     @arg_botcmd("match_name", type=str)
     @tournament_channel_only
@@ -244,12 +328,9 @@ class TournamentManagerPlugin(BotPlugin):
         """
         try:
             captain_name = msg.frm.fullname
-            alias = self.tournament_service.get_captain_tournament_alias(
-                self["tournaments"], captain_name
-            )
+            alias = self._get_captain_alias(captain_name)
 
-            with update_tournament(self, alias) as tournament:
-                match = self.tournament_service.get_match_by_name(tournament, match_name)
+            with update_match(self, alias, match_name) as (tournament, match):
                 team = self.tournament_service.get_captain_team(tournament, captain_name)
                 match = self.match_service.join_match(match, int(team.id), team.name)
         except AppError as err:
@@ -266,9 +347,14 @@ class TournamentManagerPlugin(BotPlugin):
         status is set to PENDING.
         E.g. `!leave match_1`
         """
-        with self.mutable("tournaments") as tournaments:
-            team, tournament = self._find_captain_team(msg.frm.fullname, tournaments)
-            if not team:
+        alias = self._find_captain_alias(msg.frm.fullname)
+        if not alias:
+            return "You are not a team captain."
+
+        with self._tournament_lock(alias):
+            # the tournament may have been removed or reloaded before the lock was held
+            team, tournament = self._find_captain_team(msg.frm.fullname)
+            if not team or tournament.alias != alias:
                 return "You are not a team captain."
 
             match = tournament.find_match_by_name(match_name)
@@ -284,8 +370,8 @@ class TournamentManagerPlugin(BotPlugin):
             match.teams_joined.remove(team.id)
 
             # Save tournament changes to db
-            tournaments.update({tournament.alias: tournament.to_dict()})
-            self.send(msg.frm, f"Team `{team.name}` has left the match `{match.name}`!")
+            self._save_tournament(tournament.alias, tournament, match)
+        self.send(msg.frm, f"Team `{team.name}` has left the match `{match.name}`!")
 
     @arg_botcmd("team_name", type=str, nargs="+")
     @arg_botcmd("alias", type=str)
@@ -298,7 +384,7 @@ class TournamentManagerPlugin(BotPlugin):
         """
         team_name = " ".join(team_name)
 
-        team, tournament = self._find_captain_team(msg.frm.fullname, self["tournaments"])
+        team, tournament = self._find_captain_team(msg.frm.fullname)
         if team:
             return (
                 f"You are currently the captain of the team `{team.name}` for the "
@@ -336,17 +422,20 @@ class TournamentManagerPlugin(BotPlugin):
         except ValueError:
             return f"User `{discord_user}` not found."
 
-        if self._find_captain_team(discord_user, self["tournaments"])[0]:
+        if self._find_captain_team(discord_user)[0]:
             return f"User `{discord_user}` is already the captain of a team."
 
         try:
             with update_tournament(self, alias) as tournament:
                 team = self.tournament_service.get_team_by_id(tournament, team_id)
-                if team.captain:
+                previous_captain = team.captain
+                if not tournament.set_team_captain(team, discord_user):
+                    linked_team = tournament.find_team_by_captain(discord_user)
+                    raise TournamentTeamCaptainExists(linked_team.name, discord_user)
+                if previous_captain:
                     self._remove_discord_team_captain(
-                        self.build_identifier(team.captain), tournament.captain_role
+                        self.build_identifier(previous_captain), tournament.captain_role
                     )
-                team.captain = discord_user
                 self._add_discord_team_captain(user, team.name, tournament.captain_role)
         except AppError as err:
             return err
@@ -375,23 +464,23 @@ class TournamentManagerPlugin(BotPlugin):
         [Admin] Show difference between current Tournament and
         Toornament participants list
         """
-        if alias not in self["tournaments"]:
+        tournament = self._get_tournament(alias)
+        if tournament is None:
             return "Tournament not found"
 
         # current tournament teams ids
-        tournament = Tournament.from_dict(self["tournaments"][alias])
-        tournament_team_ids = set(p.id for p in tournament.teams)
+        tournament_team_ids = frozenset(map(attrgetter("id"), tournament.teams))
         # toornament participants ids
         participants = self.toornament_api_client.get_participants(tournament.id)
-        toornament_participant_ids = set(p["id"] for p in participants)
+        if participants is None:
+            return "Could not fetch the Toornament participants"
+        toornament_participant_ids = frozenset(map(itemgetter("id"), participants))
 
         teams_deleted = tournament_team_ids - toornament_participant_ids
         teams_added = toornament_participant_ids - tournament_team_ids
 
-        self.send(
-            msg.frm, f"**Teams ID deleted:**\n" + "\n".join(i for i in teams_deleted)
-        )
-        self.send(msg.frm, f"**Teams ID added:**\n" + "\n".join(i for i in teams_added))
+        self.send(msg.frm, f"**Teams ID deleted:**\n" + "\n".join(teams_deleted))
+        self.send(msg.frm, f"**Teams ID added:**\n" + "\n".join(teams_added))
 
     @arg_botcmd("role", type=str, nargs="+")
     @arg_botcmd("alias", type=str, admin_only=True)
@@ -408,6 +497,7 @@ class TournamentManagerPlugin(BotPlugin):
         except AppError as err:
             return err
 
+        self._clear_admin_cache()
         return f"Roles successfully removed from the tournament `{tournament.alias}`"
 
     @arg_botcmd("alias", type=str)
@@ -464,9 +554,14 @@ class TournamentManagerPlugin(BotPlugin):
         [Linked] Remove a submitted match score.
         E.g. `!remove score match_1`
         """
-        with self.mutable("tournaments") as tournaments:
-            team, tournament = self._find_captain_team(msg.frm.fullname, tournaments)
-            if not team:
+        alias = self._find_captain_alias(msg.frm.fullname)
+        if not alias:
+            return "You are not a team captain."
+
+        with self._tournament_lock(alias):
+            # the tournament may have been removed or reloaded before the lock was held
+            team, tournament = self._find_captain_team(msg.frm.fullname)
+            if not team or tournament.alias != alias:
                 return "You are not a team captain."
 
             match = tournament.find_match_by_name(match_name)
@@ -483,11 +578,11 @@ class TournamentManagerPlugin(BotPlugin):
             if not score:
                 return f"No score found for the match `{match_name}`"
 
-            team.score_submissions.remove(score)
+            team.remove_submission(score)
 
             # Save tournament changes to db
-            tournaments.update({tournament.alias: tournament.to_dict()})
-            return f"Score for match `{match_name}` successfully deleted."
+            self._save_tournament(tournament.alias, tournament, team)
+        return f"Score for match `{match_name}` successfully deleted."
 
     @arg_botcmd("team_id", type=int)
     @arg_botcmd("alias", type=str)
@@ -516,12 +611,19 @@ class TournamentManagerPlugin(BotPlugin):
         [Admin] Associate a Discord role to a tournament.
         E.g. `!remove tournament fortnite`
         """
-        if alias not in self["tournaments"]:
+        if alias not in self._get_stored_tournaments():
             return "Tournament not found."
 
-        with self.mutable("tournaments") as tournaments:
-            tournaments.pop(alias)
-            return f"Tournament successfully removed."
+        with self._tournament_lock(alias):
+            with self._pending_writes_lock:
+                self._pending_writes.discard(alias)
+                self._serialized_tournaments.pop(alias, None)
+                with self.mutable("tournaments") as tournaments:
+                    tournaments.pop(alias, None)
+            self._tournament_cache.pop(alias, None)
+            self._index_captains(alias, ())
+        self._clear_admin_cache()
+        return f"Tournament successfully removed."
 
     @arg_botcmd("status", type=str)
     @arg_botcmd("match_name", type=str)
@@ -533,33 +635,42 @@ class TournamentManagerPlugin(BotPlugin):
         E.g. !set match status fortnite match_1 completed
         """
         try:
-            with update_tournament(self, alias) as tournament:
-                match = self.tournament_service.get_match_by_name(tournament, match_name)
+            with update_match(self, alias, match_name) as (tournament, match):
                 self.match_service.set_match_status(match, status)
         except AppError as err:
             return err
 
         return f"Match `{match_name}` status set to `{status.upper()}`."
 
-    @arg_botcmd("team_id", type=int)
+    @arg_botcmd("team_ids", type=int, nargs="+")
     @arg_botcmd("alias", type=str)
     @tournament_admin_only
-    def reset_team(self, msg: Message, alias: str, team_id: int):
+    def reset_team(self, msg: Message, alias: str, team_ids: List[int]):
         """
-        [Admin] Reset a team information and linked captain.
-        E.g. `!reset team fortnite 123456789`
+        [Admin] Reset teams information and linked captains.
+        E.g. `!reset team fortnite 123456789 987654321`
         """
         try:
             with update_tournament(self, alias) as tournament:
-                team = self.tournament_service.reset_tournament_team(tournament, team_id)
-                if team.captain:
+                captains = [
+                    team.captain
+                    for team in (
+                        self.tournament_service.get_team_by_id(tournament, team_id)
+                        for team_id in team_ids
+                    )
+                    if team.captain
+                ]
+                teams = self.tournament_service.reset_tournament_teams(
+                    tournament, team_ids
+                )
+                for captain in captains:
                     self._remove_discord_team_captain(
-                        self.build_identifier(team.captain), tournament.captain_role
+                        self.build_identifier(captain), tournament.captain_role
                     )
         except AppError as err:
             return err
 
-        return f"Team {team.name} successfully updated."
+        return f"Teams {', '.join(team.name for team in teams)} successfully updated."
 
     @arg_botcmd("match_name", type=str)
     @arg_botcmd("alias", type=str)
@@ -569,10 +680,10 @@ class TournamentManagerPlugin(BotPlugin):
         Show a tournament's match.
         E.g. `!show match fortnite match1`
         """
-        if alias not in self["tournaments"]:
+        tournament = self._get_tournament(alias)
+        if tournament is None:
             return "Tournament not found"
 
-        tournament = Tournament.from_dict(self["tournaments"][alias])
         match = tournament.find_match_by_name(match_name)
         if not match:
             return f"Match `{match_name}` not found in tournament `{tournament.alias}`"
@@ -586,11 +697,11 @@ class TournamentManagerPlugin(BotPlugin):
         Show the matches of a tournament.
         E.g. `!show matches fortnite`
         """
-        if alias not in self["tournaments"]:
+        tournament = self._get_tournament(alias)
+        if tournament is None:
             return "Tournament not found"
 
         fields = []
-        tournament = Tournament.from_dict(self["tournaments"][alias])
         team = tournament.find_team_by_captain(msg.frm.fullname)
         for match in tournament.matches:
             fields.append(
@@ -616,10 +727,10 @@ class TournamentManagerPlugin(BotPlugin):
         [Admin] Show a tournament match score submissions.
         E.g. `!show match scores fortnite match_1`
         """
-        if alias not in self["tournaments"]:
+        tournament = self._get_tournament(alias)
+        if tournament is None:
             return "Tournament not found"
 
-        tournament = Tournament.from_dict(self["tournaments"][alias])
         match = tournament.find_match_by_name(match_name)
         if not match:
             return f"Match `{match_name}` not found."
@@ -628,13 +739,14 @@ class TournamentManagerPlugin(BotPlugin):
         if not match_scores:
             return "No score submissions found for this match."
 
-        match_scores = sorted(match_scores, key=lambda k: getattr(k, "position"))
-        match_scores_chunk = chunks(match_scores, 25)
+        # the list is built per call, sort it in place
+        match_scores.sort(key=attrgetter("position"))
+        chunks_count = n_chunks(len(match_scores), 25)
+        title = f"{match.name} @ {tournament.alias} Score Submissions"
 
-        for i, chunk in enumerate(match_scores_chunk):
+        for i, chunk in enumerate(chunks(match_scores, 25)):
             self.send_card(
-                title=f"{match.name} @ {tournament.alias} Score Submissions "
-                f"({i + 1}/{len(match_scores_chunk)})",
+                title=f"{title} ({i + 1}/{chunks_count})",
                 fields=((str(score.team_name), str(score)) for score in chunk),
                 in_reply_to=msg,
                 color="grey",
@@ -647,7 +759,7 @@ class TournamentManagerPlugin(BotPlugin):
         [Linked] Show your team match score submissions history.
         E.g. `!show scores`
         """
-        team, tournament = self._find_captain_team(msg.frm.fullname, self["tournaments"])
+        team, tournament = self._find_captain_team(msg.frm.fullname)
         if not team:
             return "You are not linked to a team."
 
@@ -664,7 +776,7 @@ class TournamentManagerPlugin(BotPlugin):
     @private_message_only
     def show_status(self, msg, args):
         """ Show your currently linked team and joined matched. """
-        team, tournament = self._find_captain_team(msg.frm.fullname, self["tournaments"])
+        team, tournament = self._find_captain_team(msg.frm.fullname)
         if not team:
             return "You are not the captain of a team."
 
@@ -707,25 +819,22 @@ class TournamentManagerPlugin(BotPlugin):
         Show a team information.
         E.g. `!show team fortnite Team Liquid`
         """
-        if alias not in self["tournaments"]:
+        tournament = self._get_tournament(alias)
+        if tournament is None:
             return "Tournament not found"
 
         team_name = " ".join(team_name)
 
-        with self.mutable("tournaments") as tournaments:
-            tournament = Tournament.from_dict(tournaments[alias])
-            team = tournament.find_team_by_name(team_name)
-            if not team:
-                return (
-                    f"Team `{team_name}` not found in the tournament `{tournament.alias}`"
-                )
+        team = tournament.find_team_by_name(team_name)
+        if not team:
+            return f"Team `{team_name}` not found in the tournament `{tournament.alias}`"
 
-            self.send_card(
-                in_reply_to=msg,
-                title=f"{team.name} @ {tournament.info.name}",
-                **team.show_card(),
-                color="grey",
-            )
+        self.send_card(
+            in_reply_to=msg,
+            title=f"{team.name} @ {tournament.info.name}",
+            **team.show_card(),
+            color="grey",
+        )
 
     @arg_botcmd("team_id", type=int)
     @arg_botcmd("alias", type=str)
@@ -735,10 +844,10 @@ class TournamentManagerPlugin(BotPlugin):
         Show a team information.
         E.g. `!show team by id fortnite 123456789`
         """
-        if alias not in self["tournaments"]:
+        tournament = self._get_tournament(alias)
+        if tournament is None:
             return "Tournament not found"
 
-        tournament = Tournament.from_dict(self["tournaments"][alias])
         team = tournament.find_team_by_id(team_id)
         if not team:
             return f"Team `{team.name}` not found in the tournament `{tournament.alias}`"
@@ -757,33 +866,33 @@ class TournamentManagerPlugin(BotPlugin):
         Show teams linked on Discord.
         E.g. `!show teams fortnite`
         """
-        if alias not in self["tournaments"]:
+        tournament = self._get_tournament(alias)
+        if tournament is None:
             return "Tournament doesn't exists"
 
-        tournament = Tournament.from_dict(self["tournaments"][alias])
-        participants = sorted(tournament.teams, key=lambda k: getattr(k, "name"))
-        participants = [p for p in participants if p.captain is not None]
+        participants = sorted(tournament.get_linked_teams(), key=attrgetter("name"))
         if len(participants) == 0:
             return "No team registered for this tournament"
 
+        # same header for every card
+        header = (
+            f"Number of teams: "
+            f"{len(tournament.teams)} \n"
+            f"Number of registrations: "
+            f"{tournament.count_linked_teams()}\n\n"
+        )
         count = 1
-        participants_chunks = chunks(participants, 100)
-        for i, chunk in enumerate(participants_chunks):
-            team_names = ""
-            for team in chunk:
-                team_names += f"{count}. {team.name}\n"
-                count += 1
+        chunks_count = n_chunks(len(participants), 100)
+        for i, chunk in enumerate(chunks(participants, 100)):
+            team_names = "".join(
+                f"{count + j}. {team.name}\n" for j, team in enumerate(chunk)
+            )
+            count += len(chunk)
 
             self.send_card(
                 title=f"{tournament.alias} Registered Participants"
-                f"({i + 1}/{len(participants_chunks)})",
-                body=(
-                    f"Number of teams: "
-                    f"{len(tournament.teams)} \n"
-                    f"Number of registrations: "
-                    f"{tournament.count_linked_teams()}\n\n"
-                    f"{team_names}"
-                ),
+                f"({i + 1}/{chunks_count})",
+                body=header + team_names,
                 color="grey",
                 in_reply_to=msg,
             )
@@ -795,36 +904,35 @@ class TournamentManagerPlugin(BotPlugin):
         Show teams not linked on Discord.
         E.g. `!show teams missing fortnite`
         """
-        if alias not in self["tournaments"]:
+        tournament = self._get_tournament(alias)
+        if tournament is None:
             return "Tournament doesn't exists"
 
-        tournament = Tournament.from_dict(self["tournaments"][alias])
-        participants = sorted(tournament.teams, key=lambda k: getattr(k, "name"))
-        participants = [p for p in participants if p.captain is None]
+        participants = sorted(
+            (p for p in tournament.teams if p.captain is None), key=attrgetter("name")
+        )
         if len(participants) == 0:
             return "Every team are registered for this tournament"
 
-        missing_participants_count = (
-            len(tournament.teams) - tournament.count_linked_teams()
+        # same header for every card
+        header = (
+            f"Number of teams: "
+            f"{len(tournament.teams)} \n"
+            f"Number of missing registrations: "
+            f"{len(tournament.teams) - tournament.count_linked_teams()}\n\n"
         )
         count = 1
-        participants_chunks = chunks(participants, 100)
-        for i, chunk in enumerate(participants_chunks):
-            team_names = ""
-            for team in chunk:
-                team_names += f"{count}. {team.name}\n"
-                count += 1
+        chunks_count = n_chunks(len(participants), 100)
+        for i, chunk in enumerate(chunks(participants, 100)):
+            team_names = "".join(
+                f"{count + j}. {team.name}\n" for j, team in enumerate(chunk)
+            )
+            count += len(chunk)
 
             self.send_card(
                 title=f"{tournament.alias} Missing Registrations "
-                f"({i + 1}/{len(participants_chunks)})",
-                body=(
-                    f"Number of teams: "
-                    f"{len(tournament.teams)} \n"
-                    f"Number of missing registrations: "
-                    f"{missing_participants_count}\n\n"
-                    f"{team_names}"
-                ),
+                f"({i + 1}/{chunks_count})",
+                body=header + team_names,
                 color="grey",
                 in_reply_to=msg,
             )
@@ -835,18 +943,18 @@ class TournamentManagerPlugin(BotPlugin):
         Show a tournament.
         E.g. `!show tournament fortnite`
         """
-        if alias not in self["tournaments"]:
-            return "Tournament not found."
         tournament = self._get_tournament(alias)
+        if tournament is None:
+            return "Tournament not found."
         self._show_tournament(msg, tournament)
 
     @botcmd
     def show_tournaments(self, msg, args):
         """ Show available tournaments. E.g. `!show tournaments` """
-        if self["tournaments"]:
-            for tournament in self["tournaments"].values():
-                tournament = Tournament.from_dict(tournament)
-                self._show_tournament(msg, tournament)
+        tournaments = self._get_stored_tournaments()
+        if tournaments:
+            for alias in tournaments:
+                self._show_tournament(msg, self._get_tournament(alias, tournaments))
         else:
             return "No tournaments to show."
 
@@ -860,29 +968,33 @@ class TournamentManagerPlugin(BotPlugin):
         linked captains of this tournament that the match is going to start in 30 seconds.
         E.g. `!start match fortnite match_1`
         """
-        if alias not in self["tournaments"]:
+        if self._get_tournament(alias) is None:
             return "Tournament not found"
 
         try:
-            with update_tournament(self, alias) as tournament:
-                match = self.tournament_service.get_match_by_name(tournament, match_name)
+            with update_match(self, alias, match_name) as (tournament, match):
                 match = self.match_service.start_match(match)
-
-                for channel in tournament.channels:
-                    room = self.query_room(channel)
-                    self.send(room, f"The match `{match_name}` will start in ~30 seconds")
-
-                for team_id in match.teams_joined:
-                    team = tournament.find_team_by_id(team_id)
-                    captain_user = self.build_identifier(team.captain)
-                    self.send(
-                        captain_user,
-                        f"The match `{match_name}` for the team `{team.name}` "
-                        f"will start in ~30 seconds!",
-                    )
         except AppError as err:
             return err
 
+        # messages are sent without waiting for each other
+        for channel in tournament.channels:
+            room = self.query_room(channel)
+            self.send(room, f"The match `{match_name}` will start in ~30 seconds")
+
+        teams = [tournament.find_team_by_id(team_id) for team_id in match.teams_joined]
+        captains = self._bot.build_identifiers(
+            team.captain for team in teams if team and team.captain
+        )
+        for team in teams:
+            captain_user = team and captains.get(team.captain)
+            if captain_user:
+                self.send(
+                    captain_user,
+                    f"The match `{match_name}` for the team `{team.name}` "
+                    f"will start in ~30 seconds!",
+                )
+
         self.send(msg.frm, f"Match `{match_name}` status set to ONGOING.")
 
     @arg_botcmd("team_name", type=str, nargs="+")
@@ -894,9 +1006,14 @@ class TournamentManagerPlugin(BotPlugin):
         """
 
         team_name = " ".join(team_name)
-        with self.mutable("tournaments") as tournaments:
-            team, tournament = self._find_captain_team(msg.frm.fullname, tournaments)
-            if not team:
+        alias = self._find_captain_alias(msg.frm.fullname)
+        if not alias:
+            return "You are not the captain of a team."
+
+        with self._tournament_lock(alias):
+            # the tournament may have been removed or reloaded before the lock was held
+            team, tournament = self._find_captain_team(msg.frm.fullname)
+            if not team or tournament.alias != alias:
                 return "You are not the captain of a team."
 
             if team.name != team_name:
@@ -906,20 +1023,19 @@ class TournamentManagerPlugin(BotPlugin):
                     f"type the right team name."
                 )
 
-            team.captain = None
+            tournament.set_team_captain(team, None)
 
             # Save tournament changes to db
-            tournaments.update({tournament.alias: tournament.to_dict()})
-            self._remove_discord_team_captain(msg.frm, tournament.captain_role)
-            return f"You are no longer the captain of the team `{team_name}`."
+            self._save_tournament(tournament.alias, tournament, team)
+        self._remove_discord_team_captain(msg.frm, tournament.captain_role)
+        return f"You are no longer the captain of the team `{team_name}`."
 
     def callback_attachment(self, msg: Message, discord_msg: discord.Message):
         """ Send screenshots in private message to bot """
         if hasattr(msg.to, "fullname") and msg.to.fullname == str(self.bot_identifier):
-            cmds = ["!submit", "!add", "!add_screenshot"]
-            msg_parts = msg.body.strip().split(" ")
+            cmd, _, args = msg.body.strip().partition(" ")
 
-            if not msg_parts or msg_parts[0] not in cmds:
+            if cmd not in SUBMIT_CMDS:
                 self.send(
                     msg.frm,
                     (
@@ -937,35 +1053,19 @@ class TournamentManagerPlugin(BotPlugin):
                 return
 
             # !submit
-            if msg_parts[0] == "!submit":
-                # validate format
-                if len(msg_parts) != 6:
-                    self.send(
-                        msg.frm,
-                        (
-                            "Looks like you're trying to submit your score!\n\n"
-                            "Your screenshot must be followed with the following"
-                            " information: "
-                            "`!submit [match_name] position [number] "
-                            "eliminations [number]`\n"
-                        ),
-                    )
-                    return
-                _, match_name, _, position, _, eliminations = msg_parts
-                # invalid entries
-                if not position.isdigit() or not eliminations.isdigit():
-                    self.send(
-                        msg.frm,
-                        "Invalid entry for position or eliminations. "
-                        "A number was expected.",
-                    )
+            if cmd == "!submit":
+                submission, error = self._validate_submit(args.split(" "))
+                if error:
+                    self.send(msg.frm, error)
                     return
+                match_name, position, eliminations = submission
 
                 try:
-                    alias = self.tournament_service.get_captain_tournament_alias(
-                        self["tournaments"], msg.frm.fullname
-                    )
-                    with update_tournament(self, alias) as tournament:
+                    alias = self._get_captain_alias(msg.frm.fullname)
+                    with self._tournament_lock(alias):
+                        tournament = self._get_tournament(alias)
+                        if tournament is None:
+                            raise TournamentNotFound(alias)
                         team = self.tournament_service.get_captain_team(
                             tournament, msg.frm.fullname
                         )
@@ -974,9 +1074,11 @@ class TournamentManagerPlugin(BotPlugin):
                             match_name=match_name,
                             team_id=int(team.id),
                             urls=[a.url for a in discord_msg.attachments],
-                            position=int(position),
-                            eliminations=int(eliminations),
+                            position=position,
+                            eliminations=eliminations,
                         )
+                        # only the team's score submissions changed
+                        self._save_tournament(alias, tournament, team)
                 except AppError as err:
                     self.send(msg.frm, str(err))
                     return
@@ -987,14 +1089,11 @@ class TournamentManagerPlugin(BotPlugin):
                     "to see your score submissions history.",
                 )
             # add screenshot
-            elif (msg_parts[0] == "!add" and msg_parts[1] == "screenshot") or (
-                msg_parts[0] == "!add_screenshot"
-            ):
-                if len(msg_parts) == 3:
-                    match_name = msg_parts[2]
-                elif len(msg_parts) == 2:
-                    match_name = msg_parts[1]
-                else:
+            elif cmd == "!add_screenshot" or args.partition(" ")[0] == "screenshot":
+                if cmd == "!add":
+                    args = args.partition(" ")[2]
+                match_name, _, extra_args = args.partition(" ")
+                if not match_name or extra_args:
                     self.send(
                         msg.frm,
                         "Invalid command format. Use `!add screenshot [match_name]`",
@@ -1002,10 +1101,11 @@ class TournamentManagerPlugin(BotPlugin):
                     return
 
                 try:
-                    alias = self.tournament_service.get_captain_tournament_alias(
-                        self["tournaments"], msg.frm.fullname
-                    )
-                    with update_tournament(self, alias) as tournament:
+                    alias = self._get_captain_alias(msg.frm.fullname)
+                    with self._tournament_lock(alias):
+                        tournament = self._get_tournament(alias)
+                        if tournament is None:
+                            raise TournamentNotFound(alias)
                         team = self.tournament_service.get_captain_team(
                             tournament, msg.frm.fullname
                         )
@@ -1015,6 +1115,8 @@ class TournamentManagerPlugin(BotPlugin):
                             team_id=int(team.id),
                             urls=[a.url for a in discord_msg.attachments],
                         )
+                        # only the team's score submissions changed
+                        self._save_tournament(alias, tournament, team)
                 except AppError as err:
                     self.send(msg.frm, str(err))
                     return
@@ -1031,7 +1133,31 @@ class TournamentManagerPlugin(BotPlugin):
         """ Display bot commands """
 
         # Sketchy override of the bot help command
+        help_general, help_linked, help_admin = self._get_help_messages()
+        parts = [help_general, help_linked]
+        if self._is_tournament_admin(msg.frm):
+            parts.append(help_admin)
+        parts.append(
+            "Commands summary are also available at this link: "
+            "<https://docs.google.com/document/d/1eedLoQdVLVe2JkCe19g69w-UUL49iFW93mz4piypY1k/edit?usp=sharing>",
+            # noqa
+        )
+
+        # send as few messages as possible
+        for help_message in join_chunks(parts, self._bot.message_limit):
+            self.send(msg.frm, help_message)
 
+    def _get_help_messages(self) -> Tuple[str, str, str]:
+        """
+        General, linked captains and admin help messages, built once and rebuilt only
+        when the bot commands change (e.g. a plugin is activated)
+        """
+        commands_count = len(self._bot.commands)
+        if self._help_messages is None or self._help_messages[0] != commands_count:
+            self._help_messages = (commands_count, self._build_help_messages())
+        return self._help_messages[1]
+
+    def _build_help_messages(self) -> Tuple[str, str, str]:
         def sanitize_cmd(cmd_text: str):
             return " ".join(l.strip() for l in cmd_text.split("\n"))
 
@@ -1082,7 +1208,7 @@ class TournamentManagerPlugin(BotPlugin):
             "\n\n"
         )
         help_message += "\n\n".join(f"**!{name}**\n{descr}" for name, descr in commands)
-        self.send(msg.frm, help_message)
+        help_general = help_message
 
         # Linked Commands
         help_message = (
@@ -1107,23 +1233,16 @@ class TournamentManagerPlugin(BotPlugin):
             "Submitting a different score than what is displayed on your screenshot "
             "will result in a sanction.\n"
         )
-        self.send(msg.frm, help_message)
+        help_linked = help_message
 
         # Admin Commands
-        if self._is_tournament_admin(msg.frm):
-            help_message = "```Admin Commands```\n"
-            help_message += "\n\n".join(
-                f"**!{name}**\n{descr[9:]}" for name, descr in admin_commands
-            )
-            self.send(msg.frm, help_message)
-
-        self.send(
-            msg.frm,
-            "Commands summary are also available at this link: "
-            "<https://docs.google.com/document/d/1eedLoQdVLVe2JkCe19g69w-UUL49iFW93mz4piypY1k/edit?usp=sharing>",
-            # noqa
+        help_message = "```Admin Commands```\n"
+        help_message += "\n\n".join(
+            f"**!{name}**\n{descr[9:]}" for name, descr in admin_commands
         )
 
+        return help_general, help_linked, help_message
+
     @staticmethod
     def _add_discord_team_captain(
         user: DiscordPerson, team_name: str, captain_role: Optional[str]
@@ -1137,35 +1256,71 @@ class TournamentManagerPlugin(BotPlugin):
         discord_captain_name = f"{user.nick}[{discord_team_name}]"
 
         # Update username nickname
-        user.edit_nickname(discord_captain_name)
+        nickname_edit = user.edit_nickname(discord_captain_name)
 
         if captain_role:
             if not user.has_guild_role(captain_role):
-                sleep(1)
-                user.add_role(captain_role)
+                # update the roles once the nickname is applied, without blocking
+                nickname_edit.add_done_callback(
+                    partial(_change_role_once_renamed, user.add_role, captain_role)
+                )
+
+    def _find_captain_alias(self, username: str) -> Optional[str]:
+        """ Alias of the tournament for which the user is linked to a team """
+        if self._captain_index is None:
+            captain_index = {}
+            tournaments = self._get_stored_tournaments()
+            for alias, t in tournaments.items():
+                captains = t.get("captains")
+                if captains is None:
+                    # saved before the captains index existed
+                    tournament = self._get_tournament(alias, tournaments)
+                    captains = [team.captain for team in tournament.get_linked_teams()]
+                for captain in captains:
+                    captain_index.setdefault(captain, alias)
+            self._captain_index = captain_index
+        return self._captain_index.get(username)
 
-    @staticmethod
     def _find_captain_team(
-        username: str, tournaments: dict
+        self, username: str
     ) -> Tuple[Optional[Team], Optional[Tournament]]:
-        for t in tournaments.values():
-            tournament = Tournament.from_dict(t)
+        alias = self._find_captain_alias(username)
+        tournament = self._get_tournament(alias) if alias else None
+        if tournament:
             team = tournament.find_team_by_captain(username)
             if team:
                 return team, tournament
         return None, None
 
+    def _get_captain_alias(self, username: str) -> str:
+        alias = self._find_captain_alias(username)
+        if not alias:
+            raise PermissionDeniedNotTeamCaptain()
+        return alias
+
+    def _index_captains(self, alias: str, captains: Iterable[str]):
+        """ Update the captain index with the current captains of a tournament """
+        if self._captain_index is None:
+            return
+        for captain, captain_alias in list(self._captain_index.items()):
+            if captain_alias == alias:
+                del self._captain_index[captain]
+        for captain in captains:
+            self._captain_index.setdefault(captain, alias)
+
     @staticmethod
     def _remove_discord_team_captain(user: DiscordPerson, captain_role: Optional[str]):
         """
         Reset Discord user nickname and remove role if tournament captain_role is set
         """
-        user.edit_nickname(user.username)
+        nickname_edit = user.edit_nickname(user.username)
 
         if captain_role:
             if user.has_guild_role(captain_role):
-                sleep(1)
-                user.remove_role(captain_role)
+                # update the roles once the nickname is applied, without blocking
+                nickname_edit.add_done_callback(
+                    partial(_change_role_once_renamed, user.remove_role, captain_role)
+                )
 
     def _show_match(self, msg, tournament: Tournament, match: Match):
         team = tournament.find_team_by_captain(msg.frm.fullname)
@@ -1200,10 +1355,11 @@ class TournamentManagerPlugin(BotPlugin):
                 f"**Team Name:** {team.name}\n" f"**Team Players:** {team_players}"
             )
 
-        administrators = []
-        for admin_role in tournament.administrator_roles:
-            administrators.extend(self._bot.get_role_members(admin_role))
-        admins = ", ".join(administrators)
+        admins = ", ".join(
+            itertools.chain.from_iterable(
+                self._get_role_members(role) for role in tournament.administrator_roles
+            )
+        )
 
         self.send_card(
             body=f"{tournament.url}\n\n{team_status_text}",
@@ -1213,21 +1369,203 @@ class TournamentManagerPlugin(BotPlugin):
             **tournament.show_card(),
         )
 
+    def _get_role_members(self, role: str) -> List[str]:
+        """ Cached for `ROLE_MEMBERS_CACHE_TTL` seconds, empty for an unknown role """
+        cached = self._role_members_cache.get(role)
+        if cached and time.monotonic() - cached[0] < ROLE_MEMBERS_CACHE_TTL:
+            return cached[1]
+
+        members = self._bot.get_role_members(role) or []
+        self._role_members_cache[role] = (time.monotonic(), members)
+        return members
+
     def _is_tournament_admin(self, user: DiscordPerson) -> bool:
-        admin_roles = list(
-            itertools.chain(
-                *[t["administrator_roles"] for t in self["tournaments"].values()]
-            )
-        )
+        """ Cached for `ADMIN_CACHE_TTL` seconds, see `_check_tournament_admin` """
+        cached = self._admin_cache.get(user.fullname)
+        if cached and time.monotonic() - cached[0] < ADMIN_CACHE_TTL:
+            return cached[1]
+
+        is_admin = self._check_tournament_admin(user)
+        self._admin_cache[user.fullname] = (time.monotonic(), is_admin)
+        return is_admin
+
+    def _check_tournament_admin(self, user: DiscordPerson) -> bool:
         if user.fullname in self.bot_config.BOT_ADMINS or any(
-            user.has_guild_role(r) for r in admin_roles
+            user.has_guild_role(r) for r in self._get_admin_roles()
         ):
             return True
         return False
 
-    def _get_tournament(self, alias: str):
-        return Tournament.from_dict(self["tournaments"][alias])
+    def _get_admin_roles(self) -> FrozenSet[str]:
+        """ Administrator roles of every tournament, cached until an admin role change """
+        if self._admin_roles is None:
+            tournaments = self._get_stored_tournaments()
+            self._admin_roles = frozenset(
+                itertools.chain.from_iterable(
+                    t["administrator_roles"] for t in tournaments.values()
+                )
+            )
+        return self._admin_roles
+
+    def _clear_admin_cache(self):
+        self._admin_cache.clear()
+        self._admin_roles = None
+
+    @staticmethod
+    def _validate_submit(
+        args: List[str],
+    ) -> Tuple[Optional[Tuple[str, int, int]], Optional[str]]:
+        """
+        Parse the arguments of `!submit [match_name] position [number] eliminations
+        [number]`, return `(match_name, position, eliminations)` or the error to send
+        """
+        # validate format
+        if len(args) != 5:
+            return (
+                None,
+                "Looks like you're trying to submit your score!\n\n"
+                "Your screenshot must be followed with the following information: "
+                "`!submit [match_name] position [number] eliminations [number]`\n",
+            )
+        match_name, _, position, _, eliminations = args
+        # invalid entries
+        try:
+            position = int(position)
+            eliminations = int(eliminations)
+        except ValueError:
+            position = eliminations = -1
+        if position < 0 or eliminations < 0:
+            return (
+                None,
+                "Invalid entry for position or eliminations. A number was expected.",
+            )
 
-    def _save_tournament(self, alias: str, tournament: Tournament):
-        with self.mutable("tournaments") as tournaments:
-            tournaments.update({alias: tournament.to_dict()})
+        return (match_name, position, eliminations), None
+
+    def _get_tournament(
+        self, alias: str, stored_tournaments: Optional[Dict[str, dict]] = None
+    ) -> Optional[Tournament]:
+        """
+        Cached tournament, parsed from storage on first use.
+        `stored_tournaments` is used instead of reading the storage again if given
+        """
+        tournament = self._tournament_cache.get(alias)
+        if tournament is None:
+            if stored_tournaments is None:
+                stored_tournaments = self._get_stored_tournaments()
+            stored = stored_tournaments.get(alias)
+            if stored is None:
+                return None
+            # keep the tournament cached meanwhile by another command, if any
+            tournament = self._tournament_cache.setdefault(
+                alias, Tournament.from_dict(stored)
+            )
+            self._serialized_tournaments.setdefault(alias, stored)
+        return tournament
+
+    def _tournament_lock(self, alias: str) -> threading.RLock:
+        """ Lock held while a command updates and saves the tournament `alias` """
+        with self._tournament_locks_lock:
+            lock = self._tournament_locks.get(alias)
+            if lock is None:
+                lock = self._tournament_locks[alias] = threading.RLock()
+        return lock
+
+    def _get_stored_tournaments(self) -> Dict[str, dict]:
+        """ Serialized tournaments by alias, including the ones not yet written """
+        # a flush between reading the storage and the pending writes would lose them
+        with self._pending_writes_lock:
+            tournaments = self["tournaments"]
+            if self._pending_writes:
+                tournaments = {
+                    **tournaments,
+                    **{a: self._serialized_tournaments[a] for a in self._pending_writes},
+                }
+        return tournaments
+
+    def _save_tournament(
+        self, alias: str, tournament: Tournament, *changed: Union[Match, Team]
+    ):
+        """
+        Update the cached tournament, storage is updated by `_flush_pending_writes`
+        so successive updates are written at once.
+        When only some matches or teams `changed`, only those are serialized again.
+        """
+        # concurrent saves of a tournament would otherwise patch the same previous
+        # serialized dict and drop each other's changes
+        with self._tournament_lock(alias):
+            self._tournament_cache[alias] = tournament
+            previous = self._serialized_tournaments.get(alias)
+            serialized = None
+            if changed and previous is not None:
+                serialized = _update_serialized(previous, tournament, changed)
+            if serialized is None:
+                serialized = tournament.to_dict()
+            captains = serialized.get("captains")
+            if captains is not None and (
+                previous is None or captains is not previous.get("captains")
+            ):
+                self._index_captains(alias, captains)
+            with self._pending_writes_lock:
+                self._serialized_tournaments[alias] = serialized
+                self._pending_writes.add(alias)
+                flush = len(self._pending_writes) >= PERSIST_MAX_PENDING
+        if flush:
+            self._flush_pending_writes()
+
+    def _flush_pending_writes(self):
+        """ Write the updated tournaments to storage """
+        with self._pending_writes_lock:
+            if not self._pending_writes:
+                return
+            with self.mutable("tournaments") as tournaments:
+                for alias in self._pending_writes:
+                    tournaments[alias] = self._serialized_tournaments[alias]
+            self._pending_writes = set()
+
+
+def _change_role_once_renamed(
+    change_role: Callable[[str], None], role: str, nickname_edit: Future
+):
+    """
+    Done callback of a nickname edit, add or remove the user `role` once the nickname
+    is applied. Runs on the Discord event loop, so errors are logged here
+    """
+    if nickname_edit.cancelled():
+        logger.error(f"Nickname edit cancelled, role `{role}` not updated")
+        return
+    error = nickname_edit.exception()
+    if error:
+        logger.error(f"Nickname edit failed, role `{role}` not updated: {error}")
+        return
+    try:
+        change_role(role)
+    except Exception as err:
+        logger.error(f"Can't update role `{role}`: {err}")
+
+
+def _update_serialized(
+    serialized: dict, tournament: Tournament, changed: Iterable[Union[Match, Team]]
+) -> Optional[dict]:
+    """
+    Copy of a serialized tournament where only the `changed` matches or teams are
+    serialized again, None if the serialized tournament is out of sync
+    """
+    serialized = dict(serialized)
+    for item in changed:
+        if isinstance(item, Match):
+            key, items = "matches", tournament.matches
+        else:
+            key, items = "teams", tournament.teams
+            # the team captain may have changed
+            captains = {t.captain: t.id for t in tournament.get_linked_teams()}
+            if captains != serialized.get("captains"):
+                serialized["captains"] = captains
+        values = serialized[key] = list(serialized[key])
+        if len(values) != len(items):
+            return None
+        index = next((i for i, value in enumerate(items) if value is item), None)
+        if index is None:
+            return None
+        values[index] = item.to_dict()
+    return serialized
@@ -0,0 +1,40 @@
+import threading
+
+
+class AIMDLimiter:
+    """
+    Concurrency limit adapted with AIMD (additive increase, multiplicative decrease):
+    the limit grows by `increase` after each successful call and is multiplied by
+    `decrease` after each failed one, bounded by `min_limit` and `max_limit`.
+    """
+
+    def __init__(
+        self,
+        max_limit: int,
+        min_limit: int = 1,
+        increase: float = 0.5,
+        decrease: float = 0.5,
+    ):
+        self.max_limit = max_limit
+        self.min_limit = min_limit
+        self.increase = increase
+        self.decrease = decrease
+        self.limit = float(max_limit)
+        self._in_flight = 0
+        self._condition = threading.Condition()
+
+    def acquire(self):
+        """ Block until fewer calls than the current limit are in flight """
+        with self._condition:
+            while self._in_flight >= int(self.limit):
+                self._condition.wait()
+            self._in_flight += 1
+
+    def release(self, success: bool):
+        with self._condition:
+            self._in_flight -= 1
+            if success:
+                self.limit = min(self.max_limit, self.limit + self.increase)
+            else:
+                self.limit = max(self.min_limit, self.limit * self.decrease)
+            self._condition.notify_all()
@@ -1,3 +1,22 @@
 def chunks(l, n):
     """Yield successive n-sized chunks from l."""
-    return list(l[i : i + n] for i in range(0, len(l), n))
+    return (l[i : i + n] for i in range(0, len(l), n))
+
+
+def n_chunks(length, n):
+    """Number of chunks yielded by `chunks` for a sequence of the given length."""
+    return -(-length // n)
+
+
+def join_chunks(parts, max_length, separator="\n\n"):
+    """
+    Join successive parts into as few strings of at most max_length characters as
+    possible. A part longer than max_length is kept whole.
+    """
+    joined = []
+    for part in parts:
+        if joined and len(joined[-1]) + len(separator) + len(part) <= max_length:
+            joined[-1] += separator + part
+        else:
+            joined.append(part)
+    return joined
@@ -0,0 +1,19 @@
+import time
+from typing import Tuple
+
+# (epoch second, formatted timestamp) of the last call
+_last_timestamp: Tuple[int, str] = (0, "")
+
+
+def now_isoformat() -> str:
+    """
+    Current local time in ISO 8601 format with seconds precision, e.g.
+    `2020-10-31T20:45:10`. The string is formatted at most once per second.
+    """
+    global _last_timestamp
+    now = int(time.time())
+    last_timestamp = _last_timestamp
+    if now != last_timestamp[0]:
+        last_timestamp = (now, time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(now)))
+        _last_timestamp = last_timestamp
+    return last_timestamp[1]
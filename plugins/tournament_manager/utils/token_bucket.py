@@ -0,0 +1,45 @@
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    Allow bursts of up to `max_tokens` calls, refilled at `refill_rate` tokens per
+    second. `acquire` blocks the calling thread until a token is available.
+    """
+
+    def __init__(self, max_tokens: float, refill_rate: float):
+        self.max_tokens = max_tokens
+        self.refill_rate = refill_rate
+        self._tokens = max_tokens
+        self._updated_at = time.monotonic()
+        # no token is handed out before this time, see `drain`
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now >= self._blocked_until and self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = max(
+                    self._blocked_until - now, (1 - self._tokens) / self.refill_rate
+                )
+            time.sleep(wait)
+
+    def drain(self, seconds: float):
+        """ Empty the bucket and hand out no token for `seconds` """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = 0
+            self._updated_at = now
+            self._blocked_until = max(self._blocked_until, now + seconds)
+
+    def _refill(self, now: float):
+        # the bucket doesn't refill while blocked
+        elapsed = max(0.0, now - max(self._updated_at, self._blocked_until))
+        self._tokens = min(self.max_tokens, self._tokens + elapsed * self.refill_rate)
+        self._updated_at = now